@@ -137,18 +137,17 @@ def get_behavioral_status() -> dict:
     if FingerprintDatabase is None:
         return {}
     try:
-        import glob as glob_mod
+        import sqlite3
         
-        # Find most recent session state file
+        # Find most recently active session in the hooks' state store
         session_id = None
-        state_files = glob_mod.glob(os.path.expanduser('~/.claude/behavioral_state_*.json'))
-        if state_files:
-            # Get most recently modified
-            newest = max(state_files, key=os.path.getmtime)
+        state_db = os.path.expanduser('~/.claude/state.sqlite')
+        if os.path.exists(state_db):
             try:
-                with open(newest, 'r') as f:
-                    state = json.load(f)
-                    session_id = state.get('session_id')
+                conn = sqlite3.connect(f"file:{state_db}?mode=ro", uri=True)
+                row = conn.execute("SELECT session_id FROM tracker ORDER BY updated DESC LIMIT 1").fetchone()
+                conn.close()
+                session_id = row[0] if row else None
             except:
                 pass
         
@@ -27,16 +27,33 @@ Then configure your HTTP proxy to localhost:8888
 License: MIT
 """
 
+import bisect
 import json
+import math
 import os
+import queue
 import re
+import sqlite3
+import threading
 import time
 import statistics
+from array import array
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
 from mitmproxy import http, ctx
 
+# orjson (optional) re-encodes request bodies several times faster than json
+try:
+    import orjson
+
+    def _dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def _dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
 # Sycophancy analysis integration
 try:
     import sys
@@ -94,6 +111,7 @@ FORCE_THINKING_MODE = os.environ.get("FORCE_THINKING_MODE", "").lower() in ("1",
 FORCE_THINKING_BUDGET = os.environ.get("FORCE_THINKING_BUDGET", "")
 FORCE_BUDGET_VALUE = int(FORCE_THINKING_BUDGET) if FORCE_THINKING_BUDGET.isdigit() else None
 FORCE_INTERLEAVED = os.environ.get("FORCE_INTERLEAVED", "").lower() in ("1", "true", "yes")
+FORCE_ACTIVE = FORCE_THINKING_MODE or FORCE_BUDGET_VALUE is not None or FORCE_INTERLEAVED
 
 # Database path
 DB_PATH = os.path.expanduser("~/.claude-audit/thinking_audit.db")
@@ -111,14 +129,160 @@ def get_user_selected_model() -> str:
 
 USER_SELECTED_MODEL = get_user_selected_model()
 
+# Model-name marker -> family, checked in order
+_MODEL_FAMILIES = (("opus", "opus"), ("sonnet", "sonnet"), ("haiku", "haiku"))
+
+
+def _family_of(model: str) -> str:
+    model = model.lower()
+    for marker, family in _MODEL_FAMILIES:
+        if marker in model:
+            return family
+    return ""
+
+
+# USER_SELECTED_MODEL never changes after import, so resolve its family once
+_UI_FAMILY = _family_of(USER_SELECTED_MODEL) if USER_SELECTED_MODEL and USER_SELECTED_MODEL != "unknown" else ""
+
+
+class P2Quantile:
+    """Streaming quantile estimate (Jain & Chlamtac P² algorithm) in O(1) memory.
+
+    Exact for the first five observations; afterwards five markers track
+    the quantile with piecewise-parabolic adjustment.
+    """
+
+    def __init__(self, q: float):
+        self.q = q
+        self.heights: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, x: float) -> None:
+        h, n = self.heights, self.positions
+        if len(h) < 5:
+            bisect.insort(h, x)
+            return
+        if x < h[0]:
+            h[0], k = x, 0
+        elif x >= h[4]:
+            h[4], k = x, 3
+        else:
+            k = 0
+            while x >= h[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                hp = h[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+                if not h[i - 1] < hp < h[i + 1]:
+                    hp = h[i] + d * (h[i + d] - h[i]) / (n[i + d] - n[i])
+                h[i] = hp
+                n[i] += d
+
+    def value(self) -> float:
+        h = self.heights
+        if len(h) < 5:
+            return h[int(len(h) * self.q)] if h else 0.0
+        return h[2]
+
 
 @dataclass
-class ChunkTiming:
-    """Tracks timing for a single SSE chunk."""
-    timestamp: float
-    event_type: str
-    token_count: int = 0
-    raw_size: int = 0
+class ITTAccumulator:
+    """Online inter-token timing stats for one chunk stream.
+
+    Each chunk timestamp updates Welford running moments in O(1), so
+    response() no longer sorts and rescans per-chunk objects. ITTs >= 5000ms
+    are kept aside to preserve the outlier filter of calculate_itt_stats().
+    """
+    quantiles: bool = False   # Track p50/p90/p99 (only the combined stream needs them)
+    count: int = 0            # Chunks seen
+    first_ts: float = 0.0
+    last_ts: float = 0.0
+    n: int = 0                # ITTs below the 5000ms outlier cutoff
+    mean: float = 0.0
+    m2: float = 0.0
+    itt_min: float = math.inf
+    itt_max: float = 0.0
+    bursts: int = 0           # ITTs < 10ms (speculative decoding hits)
+    outliers: array = field(default_factory=lambda: array("d"))
+    percentiles: Tuple[P2Quantile, ...] = ()
+
+    def __post_init__(self):
+        if self.quantiles:
+            self.percentiles = (P2Quantile(0.50), P2Quantile(0.90), P2Quantile(0.99))
+
+    def add(self, ts: float) -> None:
+        self.count += 1
+        if self.count == 1:
+            self.first_ts = ts
+        else:
+            itt = (ts - self.last_ts) * 1000
+            if itt > 0:
+                self._add_itt(itt)
+        self.last_ts = ts
+
+    def _add_itt(self, itt: float) -> None:
+        if itt < 10:
+            self.bursts += 1
+        if itt >= 5000:
+            self.outliers.append(itt)
+            return
+        self.n += 1
+        delta = itt - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (itt - self.mean)
+        if itt < self.itt_min: self.itt_min = itt
+        if itt > self.itt_max: self.itt_max = itt
+        for p in self.percentiles:
+            p.add(itt)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.last_ts - self.first_ts) * 1000 if self.count else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Same shape as calculate_itt_stats() over this stream's ITTs."""
+        if self.n < 2:
+            # Too few non-outlier ITTs: fall back to all values, as calculate_itt_stats does
+            return calculate_itt_stats([self.mean] * self.n + self.outliers.tolist())
+        std_val = math.sqrt(self.m2 / (self.n - 1))
+        p50, p90, p99 = (p.value() for p in self.percentiles) if self.percentiles else (0.0, 0.0, 0.0)
+        return {
+            "mean": round(self.mean, 2), "std": round(std_val, 2),
+            "min": round(self.itt_min, 2), "max": round(self.itt_max, 2),
+            "p50": round(p50, 2), "p90": round(p90, 2), "p99": round(p99, 2),
+            "variance_coef": round(std_val / self.mean, 3) if self.mean > 0 else 0.0,
+        }
+
+    def speculation(self) -> Tuple[bool, str]:
+        """Speculative-decoding check over all ITTs, outliers included.
+
+        Flags bursty (<10 ms) arrivals combined with a high coefficient of
+        variation, per the Wiretapping LLMs paper; see _speculation_type.
+        """
+        total = self.n + len(self.outliers)
+        if total < 20:
+            return (False, None)
+        # Fold the outliers back into the running moments
+        n, mean, m2 = self.n, self.mean, self.m2
+        for itt in self.outliers:
+            n += 1
+            delta = itt - mean
+            mean += delta / n
+            m2 += delta * (itt - mean)
+        if mean <= 0:
+            return (False, None)
+        cv = math.sqrt(m2 / total) / mean
+        return _speculation_type(self.bursts / total, cv)
 
 
 @dataclass
@@ -129,13 +293,14 @@ class StreamingCapture:
     ui_api_mismatch: bool = False
     thinking_enabled: bool = False
     thinking_budget: int = 0
+    thinking_tier: str = "none"  # get_thinking_tier(thinking_budget), resolved once in request()
     start_time: float = 0.0
-    chunks: List[ChunkTiming] = field(default_factory=list)
+    all_itt: ITTAccumulator = field(default_factory=lambda: ITTAccumulator(quantiles=True))
     first_chunk_time: float = 0.0
     last_chunk_time: float = 0.0
     current_phase: str = "none"
-    thinking_chunks: List[ChunkTiming] = field(default_factory=list)
-    text_chunks: List[ChunkTiming] = field(default_factory=list)
+    thinking_itt: ITTAccumulator = field(default_factory=ITTAccumulator)
+    text_itt: ITTAccumulator = field(default_factory=ITTAccumulator)
     sse_buffer: str = ""
     model_response: str = ""
     thinking_text: str = ""  # Captured thinking content for sycophancy analysis
@@ -158,11 +323,12 @@ session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
 main_session_model = ""
 
 
+_TIER_CUTOFFS = (1024, 8000, 20000)
+_TIER_NAMES = ("none", "basic", "enhanced", "ultra")
+
+
 def get_thinking_tier(budget: int) -> str:
-    if budget >= 20000: return "ultra"
-    elif budget >= 8000: return "enhanced"
-    elif budget >= 1024: return "basic"
-    return "none"
+    return _TIER_NAMES[bisect.bisect_right(_TIER_CUTOFFS, budget)]
 
 
 def calculate_itt_stats(timings: List[float]) -> Dict[str, float]:
@@ -185,18 +351,8 @@ def calculate_itt_stats(timings: List[float]) -> Dict[str, float]:
     }
 
 
-def detect_speculative_decoding(itt_values: List[float]) -> Tuple[bool, str]:
-    """Detect speculative decoding patterns per Wiretapping LLMs paper."""
-    if len(itt_values) < 20:
-        return (False, None)
-    burst_count = sum(1 for itt in itt_values if itt < 10)
-    burst_ratio = burst_count / len(itt_values)
-    mean_itt = sum(itt_values) / len(itt_values)
-    if mean_itt <= 0:
-        return (False, None)
-    variance = sum((x - mean_itt) ** 2 for x in itt_values) / len(itt_values)
-    std_itt = variance ** 0.5
-    cv = std_itt / mean_itt
+def _speculation_type(burst_ratio: float, cv: float) -> Tuple[bool, str]:
+    """(detected, kind) from the burst ratio and ITT coefficient of variation."""
     if burst_ratio > 0.3 and cv > 0.8:
         return (True, "REST")
     elif burst_ratio > 0.2 and cv > 0.6:
@@ -208,43 +364,59 @@ def detect_speculative_decoding(itt_values: List[float]) -> Tuple[bool, str]:
     return (False, None)
 
 
-def classify_backend(itt_stats: Dict[str, float], tps: float) -> Tuple[str, float, str]:
-    if itt_stats["mean"] == 0: return ("unknown", 0.0, "unknown")
-    itt_mean, variance_coef = itt_stats["mean"], itt_stats["variance_coef"]
-    scores = {}
+def _compile_backend_table() -> Tuple[tuple, ...]:
+    """Flatten BACKENDS into tuples with centers/spans precomputed."""
+    table = []
     for backend, profile in BACKENDS.items():
         itt_min, itt_max = profile["itt_range"]
         tps_min, tps_max = profile["tps_range"]
         var_min, var_max = profile["variance_range"]
-        itt_score = 0
-        if itt_min <= itt_mean <= itt_max:
-            center = (itt_min + itt_max) / 2
-            distance = abs(itt_mean - center) / (itt_max - itt_min)
-            itt_score = 1.0 - distance
-        elif itt_mean < itt_min:
-            itt_score = max(0, 1 - (itt_min - itt_mean) / itt_min)
-        else:
-            itt_score = max(0, 1 - (itt_mean - itt_max) / itt_max)
-        tps_score = 0
-        if tps > 0:
-            if tps_min <= tps <= tps_max:
-                center = (tps_min + tps_max) / 2
-                distance = abs(tps - center) / (tps_max - tps_min)
-                tps_score = 1.0 - distance
-            elif tps < tps_min:
-                tps_score = max(0, 1 - (tps_min - tps) / tps_min)
-            else:
-                tps_score = max(0, 1 - (tps - tps_max) / tps_max)
+        table.append((
+            backend, profile["location"],
+            itt_min, itt_max, (itt_min + itt_max) / 2, itt_max - itt_min,
+            tps_min, tps_max, (tps_min + tps_max) / 2, tps_max - tps_min,
+            var_min, var_max,
+        ))
+    return tuple(table)
+
+
+# BACKENDS is fixed at import, so the scorer walks this frozen table
+_BACKEND_TABLE = _compile_backend_table()
+
+
+def _range_score(value: float, lo: float, hi: float, center: float, span: float) -> float:
+    """1.0 at the range center, falling off linearly inside and outside it."""
+    if value < lo:
+        return max(0.0, 1 - (lo - value) / lo)
+    if value > hi:
+        return max(0.0, 1 - (value - hi) / hi)
+    return 1.0 - abs(value - center) / span
+
+
+def classify_backend(itt_stats: Dict[str, float], tps: float) -> Tuple[str, float, str]:
+    if itt_stats["mean"] == 0: return ("unknown", 0.0, "unknown")
+    itt_mean, variance_coef = itt_stats["mean"], itt_stats["variance_coef"]
+    best, best_score, best_location = "unknown", -1.0, "unknown"
+    for (backend, location, itt_min, itt_max, itt_center, itt_span,
+         tps_min, tps_max, tps_center, tps_span, var_min, var_max) in _BACKEND_TABLE:
+        itt_score = _range_score(itt_mean, itt_min, itt_max, itt_center, itt_span)
+        tps_score = _range_score(tps, tps_min, tps_max, tps_center, tps_span) if tps > 0 else 0
         var_score = 1.0 if var_min <= variance_coef <= var_max else 0.5
-        scores[backend] = (itt_score * 0.5) + (tps_score * 0.3) + (var_score * 0.2)
-    best = max(scores, key=scores.get)
-    return (best, round(scores[best] * 100, 1), BACKENDS[best]["location"])
+        score = (itt_score * 0.5) + (tps_score * 0.3) + (var_score * 0.2)
+        if score > best_score:
+            best, best_score, best_location = backend, score, location
+    return (best, round(best_score * 100, 1), best_location)
+
+
+# SSE events that carry state we record; ping/content_block_stop/message_stop are ignored
+_TRACKED_EVENTS = frozenset({"message_start", "content_block_start", "content_block_delta", "message_delta"})
 
 
 def process_sse_event(capture: StreamingCapture, event: dict, now: float):
     """Process a single SSE event and update capture state."""
     event_type = event.get("type", "")
-    chunk_timing = ChunkTiming(timestamp=now, event_type=event_type)
+    if event_type not in _TRACKED_EVENTS:
+        return
     if event_type == "message_start":
         msg = event.get("message", {})
         capture.model_response = msg.get("model", "")
@@ -252,6 +424,7 @@ def process_sse_event(capture: StreamingCapture, event: dict, now: float):
         capture.input_tokens = usage.get("input_tokens", 0)
         capture.cache_creation = usage.get("cache_creation_input_tokens", 0)
         capture.cache_read = usage.get("cache_read_input_tokens", 0)
+        return  # Structural event, not a token arrival
     elif event_type == "content_block_start":
         block = event.get("content_block", {})
         block_type = block.get("type", "")
@@ -260,19 +433,20 @@ def process_sse_event(capture: StreamingCapture, event: dict, now: float):
             capture.has_thinking = True
         elif block_type == "text":
             capture.current_phase = "text"
+        return  # Structural event, not a token arrival
     elif event_type == "content_block_delta":
         delta = event.get("delta", {})
         delta_type = delta.get("type", "")
         if delta_type == "thinking_delta":
             capture.current_phase = "thinking"
-            capture.thinking_chunks.append(chunk_timing)
+            capture.thinking_itt.add(now)
             # Capture thinking text content for sycophancy analysis
             thinking_content = delta.get("thinking", "")
             if thinking_content:
                 capture.thinking_text += thinking_content
         elif delta_type == "text_delta":
             capture.current_phase = "text"
-            capture.text_chunks.append(chunk_timing)
+            capture.text_itt.add(now)
             # Capture output text content for sycophancy analysis
             text_content = delta.get("text", "")
             if text_content:
@@ -281,7 +455,25 @@ def process_sse_event(capture: StreamingCapture, event: dict, now: float):
         usage = event.get("usage", {})
         capture.output_tokens = usage.get("output_tokens", 0)
         capture.stop_reason = event.get("delta", {}).get("stop_reason", "")
-    capture.chunks.append(chunk_timing)
+    capture.all_itt.add(now)
+
+
+def _user_message_text(content, limit: int = 1000) -> str:
+    """First `limit` chars of a user message (string or content blocks)."""
+    if isinstance(content, str):
+        return content[:limit]
+    if not isinstance(content, list):
+        return ""
+    # Stop collecting blocks once the joined text would exceed the limit
+    texts, total = [], 0
+    for b in content:
+        if b.get("type") == "text":
+            text = b.get("text", "")
+            texts.append(text)
+            total += len(text) + 1
+            if total > limit:
+                break
+    return " ".join(texts)[:limit]
 
 
 def request(flow: http.HTTPFlow) -> None:
@@ -303,16 +495,12 @@ def request(flow: http.HTTPFlow) -> None:
             # Extract last user message for sycophancy analysis context
             messages = body.get("messages", [])
             if messages:
-                for msg in reversed(messages):
-                    if msg.get("role") == "user":
-                        content = msg.get("content", "")
-                        if isinstance(content, str):
-                            capture.user_message = content[:1000]  # Limit size
-                        elif isinstance(content, list):
-                            # Handle content blocks
-                            texts = [b.get("text", "") for b in content if b.get("type") == "text"]
-                            capture.user_message = " ".join(texts)[:1000]
-                        break
+                # The last message is almost always the user's; scan back only if not
+                msg = messages[-1]
+                if msg.get("role") != "user":
+                    msg = next((m for m in reversed(messages) if m.get("role") == "user"), None)
+                if msg is not None:
+                    capture.user_message = _user_message_text(msg.get("content", ""))
 
             # Optional: Block non-Opus models (disabled by default)
             # Enable with: BLOCK_NON_OPUS=1
@@ -329,10 +517,9 @@ def request(flow: http.HTTPFlow) -> None:
                     return
 
             # Detect UI->API mismatch
-            if USER_SELECTED_MODEL and USER_SELECTED_MODEL != "unknown":
-                ui_family = "opus" if "opus" in USER_SELECTED_MODEL.lower() else "sonnet" if "sonnet" in USER_SELECTED_MODEL.lower() else "haiku" if "haiku" in USER_SELECTED_MODEL.lower() else ""
-                api_family = "opus" if "opus" in capture.model_requested.lower() else "sonnet" if "sonnet" in capture.model_requested.lower() else "haiku" if "haiku" in capture.model_requested.lower() else ""
-                if ui_family and api_family and ui_family != api_family:
+            if _UI_FAMILY:
+                api_family = _family_of(capture.model_requested)
+                if api_family and api_family != _UI_FAMILY:
                     capture.ui_api_mismatch = True
                     ctx.log.warn(f"[AUDIT] UI->API MISMATCH: Selected {USER_SELECTED_MODEL} but API got {capture.model_requested}")
 
@@ -342,22 +529,22 @@ def request(flow: http.HTTPFlow) -> None:
                 capture.thinking_enabled = True
                 capture.thinking_budget = thinking.get("budget_tokens", 0)
 
-            # Force mode: Modify request if configured
-            if FORCE_THINKING_MODE or FORCE_BUDGET_VALUE is not None:
-                if "thinking" not in body:
-                    body["thinking"] = {}
+            # Force mode: Modify request if configured (skipped entirely when off)
+            if FORCE_ACTIVE:
+                original_thinking = body.get("thinking")
+                forced = dict(original_thinking) if isinstance(original_thinking, dict) else {}
                 if FORCE_THINKING_MODE:
-                    body["thinking"]["type"] = "enabled"
+                    forced["type"] = "enabled"
                     capture.thinking_enabled = True
                     ctx.log.warn(f"[AUDIT] FORCE: Enabled thinking")
                 if FORCE_BUDGET_VALUE is not None:
                     if FORCE_BUDGET_VALUE == 0:
-                        body["thinking"] = {"type": "disabled"}
+                        forced = {"type": "disabled"}
                         capture.thinking_enabled = False
                         capture.thinking_budget = 0
                     else:
-                        body["thinking"]["type"] = "enabled"
-                        body["thinking"]["budget_tokens"] = FORCE_BUDGET_VALUE
+                        forced["type"] = "enabled"
+                        forced["budget_tokens"] = FORCE_BUDGET_VALUE
                         capture.thinking_enabled = True
                         capture.thinking_budget = FORCE_BUDGET_VALUE
                         ctx.log.warn(f"[AUDIT] FORCE: Budget {original_budget} -> {FORCE_BUDGET_VALUE}")
@@ -367,19 +554,24 @@ def request(flow: http.HTTPFlow) -> None:
                     if "interleaved-thinking-2025-05-14" not in beta_features:
                         beta_features.append("interleaved-thinking-2025-05-14")
                         flow.request.headers["anthropic-beta"] = ",".join(beta_features)
-                    body["thinking"]["budget_tokens"] = 200000
-                    capture.thinking_budget = 200000
-                    ctx.log.warn(f"[AUDIT] INTERLEAVED: Budget boosted to 200k")
-                flow.request.content = json.dumps(body).encode("utf-8")
-                modified_request = True
+                        modified_request = True
+                    if forced.get("type") == "enabled":
+                        forced["budget_tokens"] = 200000
+                        capture.thinking_budget = 200000
+                        ctx.log.warn(f"[AUDIT] INTERLEAVED: Budget boosted to 200k")
+                # Only re-serialize the (often multi-KB) body when thinking actually changed
+                if forced != (original_thinking or {}):
+                    body["thinking"] = forced
+                    flow.request.content = _dumps_bytes(body)
+                    modified_request = True
     except Exception as e:
         ctx.log.warn(f"[AUDIT] Request parse error: {e}")
 
     if "opus" in capture.model_requested.lower() and not main_session_model:
         main_session_model = capture.model_requested
     streaming_captures[id(flow)] = capture
-    tier = get_thinking_tier(capture.thinking_budget)
-    tier_info = THINKING_TIERS[tier]
+    capture.thinking_tier = get_thinking_tier(capture.thinking_budget)
+    tier_info = THINKING_TIERS[capture.thinking_tier]
     tier_str = f" [{tier_info['emoji']}{tier_info['name']}:{capture.thinking_budget}]" if capture.thinking_enabled else ""
     force_str = " [FORCED]" if modified_request else ""
     ctx.log.info(f"[AUDIT] Request: {capture.model_requested}{tier_str}{force_str}")
@@ -460,41 +652,17 @@ def response(flow: http.HTTPFlow) -> None:
     total_time_ms = (end_time - capture.start_time) * 1000
     ttft_ms = (capture.first_chunk_time - capture.start_time) * 1000 if capture.first_chunk_time > 0 else 0.0
 
-    all_itts, thinking_itts, text_itts = [], [], []
-    if len(capture.chunks) > 1:
-        sorted_c = sorted(capture.chunks, key=lambda c: c.timestamp)
-        for i in range(1, len(sorted_c)):
-            itt = (sorted_c[i].timestamp - sorted_c[i-1].timestamp) * 1000
-            if itt > 0: all_itts.append(itt)
-    if len(capture.thinking_chunks) > 1:
-        sorted_t = sorted(capture.thinking_chunks, key=lambda c: c.timestamp)
-        for i in range(1, len(sorted_t)):
-            itt = (sorted_t[i].timestamp - sorted_t[i-1].timestamp) * 1000
-            if itt > 0: thinking_itts.append(itt)
-    if len(capture.text_chunks) > 1:
-        sorted_x = sorted(capture.text_chunks, key=lambda c: c.timestamp)
-        for i in range(1, len(sorted_x)):
-            itt = (sorted_x[i].timestamp - sorted_x[i-1].timestamp) * 1000
-            if itt > 0: text_itts.append(itt)
-
-    itt_stats = calculate_itt_stats(all_itts)
-    thinking_itt_stats = calculate_itt_stats(thinking_itts)
-    text_itt_stats = calculate_itt_stats(text_itts)
-
-    thinking_duration_ms = 0.0
-    if capture.thinking_chunks:
-        sorted_t = sorted(capture.thinking_chunks, key=lambda c: c.timestamp)
-        thinking_duration_ms = (sorted_t[-1].timestamp - sorted_t[0].timestamp) * 1000
-    text_duration_ms = 0.0
-    if capture.text_chunks:
-        sorted_x = sorted(capture.text_chunks, key=lambda c: c.timestamp)
-        text_duration_ms = (sorted_x[-1].timestamp - sorted_x[0].timestamp) * 1000
+    itt_stats = capture.all_itt.stats()
+    thinking_itt_stats = capture.thinking_itt.stats()
+    text_itt_stats = capture.text_itt.stats()
+    thinking_duration_ms = capture.thinking_itt.duration_ms
+    text_duration_ms = capture.text_itt.duration_ms
 
     gen_time = (capture.last_chunk_time - capture.first_chunk_time) if capture.first_chunk_time > 0 else 0
     tps = capture.output_tokens / gen_time if gen_time > 0 else 0.0
 
     backend, confidence, location = classify_backend(itt_stats, tps)
-    spec_detected, spec_type = detect_speculative_decoding(all_itts)
+    spec_detected, spec_type = capture.all_itt.speculation()
 
     model_match = 1 if capture.model_requested.lower() == capture.model_response.lower() else 0
     is_subagent = 0
@@ -569,14 +737,14 @@ def response(flow: http.HTTPFlow) -> None:
         "subagent_type": subagent_type,
         "thinking_enabled": 1 if (capture.thinking_enabled or capture.has_thinking) else 0,
         "thinking_budget_requested": capture.thinking_budget,
-        "thinking_budget_tier": get_thinking_tier(capture.thinking_budget) if capture.thinking_enabled else "none",
-        "thinking_chunk_count": len(capture.thinking_chunks),
+        "thinking_budget_tier": capture.thinking_tier if capture.thinking_enabled else "none",
+        "thinking_chunk_count": capture.thinking_itt.count,
         "thinking_tokens_used": thinking_tokens_used,
         "thinking_utilization": round(thinking_utilization, 1),
         "thinking_duration_ms": round(thinking_duration_ms, 1),
         "thinking_itt_mean_ms": thinking_itt_stats["mean"],
         "thinking_itt_std_ms": thinking_itt_stats["std"],
-        "text_chunk_count": len(capture.text_chunks),
+        "text_chunk_count": capture.text_itt.count,
         "text_duration_ms": round(text_duration_ms, 1),
         "text_itt_mean_ms": text_itt_stats["mean"],
         "text_itt_std_ms": text_itt_stats["std"],
@@ -596,7 +764,7 @@ def response(flow: http.HTTPFlow) -> None:
         "itt_p99_ms": itt_stats["p99"],
         "variance_coef": itt_stats["variance_coef"],
         "tokens_per_sec": round(tps, 1),
-        "num_chunks": len(capture.chunks),
+        "num_chunks": capture.all_itt.count,
         "classified_backend": backend,
         "confidence": confidence,
         "location": location,
@@ -630,13 +798,25 @@ def response(flow: http.HTTPFlow) -> None:
     save_to_db(sample)
 
 
-def save_to_db(sample: dict) -> None:
-    """Save sample to SQLite database."""
-    import sqlite3
-    from pathlib import Path
+# ============================================================================
+# BACKGROUND DB WRITER
+# save_to_db() only enqueues; a daemon thread owns the SQLite connection and
+# commits in batches so fsync never blocks mitmproxy's event loop.
+# ============================================================================
+_SAMPLE_QUEUE_MAX = 1024     # Drop-oldest beyond this backlog
+_COMMIT_BATCH = 16           # Commit after this many samples...
+_COMMIT_INTERVAL = 0.5       # ...or once the oldest uncommitted sample is this old (seconds)
+_STOP = object()
+_SAMPLE_Q: "queue.Queue" = queue.Queue(maxsize=_SAMPLE_QUEUE_MAX)
+
+
+def _open_db() -> sqlite3.Connection:
+    """Open the audit DB and create/migrate the audit_samples table."""
     db_path = Path(DB_PATH)
     db_path.parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(str(db_path))
+    # WAL: the statusline, hook_unified and analysis readers no longer block commits
+    conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("""
         CREATE TABLE IF NOT EXISTS audit_samples (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -683,15 +863,102 @@ def save_to_db(sample: dict) -> None:
             conn.execute(f"ALTER TABLE audit_samples ADD COLUMN {col_name} {col_type}")
         except sqlite3.OperationalError:
             pass  # Column already exists
-    
+
+    conn.commit()
+    return conn
+
+
+def _insert_sample(conn: sqlite3.Connection, sample: dict) -> None:
     cols = list(sample.keys())
     placeholders = ",".join(["?" for _ in cols])
     col_names = ",".join(cols)
     values = [sample[c] for c in cols]
     conn.execute(f"INSERT INTO audit_samples ({col_names}) VALUES ({placeholders})", values)
-    conn.commit()
-    conn.close()
-    ctx.log.info(f"[AUDIT] Saved to {DB_PATH}")
+
+
+def _discard_conn(conn: sqlite3.Connection) -> None:
+    """Roll back and close a connection after a failed write; it is reopened on next use."""
+    try:
+        conn.rollback()
+        conn.close()
+    except Exception:
+        pass
+
+
+def _db_writer() -> None:
+    """Drain _SAMPLE_Q into SQLite, committing in batches.
+
+    No DB error may end this thread: save_to_db keeps queueing, so a dead
+    writer would silently drop every later sample. A failed open or commit
+    loses only the current batch and the connection is reopened.
+    """
+    conn = None
+    pending = 0
+    first_pending = 0.0
+    while True:
+        try:
+            item = _SAMPLE_Q.get(timeout=_COMMIT_INTERVAL if pending else None)
+        except queue.Empty:
+            item = None
+        if item is _STOP:
+            break
+        queued = item is not None  # item not yet counted in pending
+        try:
+            if conn is None:
+                conn = _open_db()
+            if item is not None:
+                try:
+                    _insert_sample(conn, item)
+                    if not pending:
+                        first_pending = time.monotonic()
+                    pending += 1
+                    queued = False
+                except sqlite3.Error as e:
+                    ctx.log.error(f"[AUDIT] DB insert error: {e}")
+                    queued = False
+            if pending and (item is None or pending >= _COMMIT_BATCH
+                            or time.monotonic() - first_pending >= _COMMIT_INTERVAL):
+                conn.commit()
+                ctx.log.info(f"[AUDIT] Saved {pending} sample(s) to {DB_PATH}")
+                pending = 0
+        except Exception as e:
+            ctx.log.error(f"[AUDIT] DB write error, dropped {pending + queued} sample(s): {e}")
+            if conn is not None:
+                _discard_conn(conn)
+                conn = None
+            pending = 0
+    if conn is not None:
+        try:
+            if pending:
+                conn.commit()
+            conn.close()
+        except Exception as e:
+            ctx.log.error(f"[AUDIT] DB write error, dropped {pending} sample(s): {e}")
+
+
+_writer_thread = threading.Thread(target=_db_writer, name="audit-db-writer", daemon=True)
+_writer_thread.start()
+
+
+def save_to_db(sample: dict) -> None:
+    """Queue sample for the background writer (never blocks the proxy)."""
+    while True:
+        try:
+            _SAMPLE_Q.put_nowait(sample)
+            return
+        except queue.Full:
+            try:
+                _SAMPLE_Q.get_nowait()
+                ctx.log.warn("[AUDIT] DB writer backlog full, dropped oldest sample")
+            except queue.Empty:
+                pass
+
+
+def flush_db(timeout: float = 5.0) -> None:
+    """Stop the writer thread after it commits everything queued."""
+    if _writer_thread.is_alive():
+        _SAMPLE_Q.put(_STOP)
+        _writer_thread.join(timeout)
 
 
 class ThinkingAudit:
@@ -699,6 +966,7 @@ class ThinkingAudit:
     def request(self, flow: http.HTTPFlow) -> None: request(flow)
     def responseheaders(self, flow: http.HTTPFlow) -> None: responseheaders(flow)
     def response(self, flow: http.HTTPFlow) -> None: response(flow)
+    def done(self) -> None: flush_db()
 
 
 addons = [ThinkingAudit()]
@@ -8,49 +8,202 @@ INTEGRATED with realignment module for active re-alignment using RLHF dynamics.
 """
 
 import json
+import sqlite3
 import sys
 import os
+import time
 
-sys.path.insert(0, os.path.expanduser('~/.claude'))
-sys.path.insert(0, os.path.expanduser('~/.claude/realignment'))
+_CLAUDE_DIR = os.path.join(os.path.expanduser('~'), '.claude')
 
-# State file for tracking offense counts per session
-STATE_FILE = os.path.expanduser('~/.claude/intervention_state.json')
+sys.path.insert(0, _CLAUDE_DIR)
+sys.path.insert(0, os.path.join(_CLAUDE_DIR, 'realignment'))
 
+# Shared hook state store (WAL, so the tracker hook never blocks us)
+STATE_DB = os.path.join(_CLAUDE_DIR, 'state.sqlite')
+# Legacy JSON state, imported into STATE_DB once
+STATE_FILE = os.path.join(_CLAUDE_DIR, 'intervention_state.json')
+HISTORY_LIMIT = 20
+# Last computed signature ("<session_id>\t<signature>"), checked before the
+# fingerprint DB is imported at all
+LAST_SIGNATURE_FILE = os.path.join(_CLAUDE_DIR, 'last_signature')
+SIGNATURE_DEBOUNCE = 10  # seconds a cached no-intervention signature is trusted
+QUIET_SIGNATURES = ('VERIFIER', 'UNKNOWN')
+SIGNATURE_TTL = 30  # seconds a cached combined signature is reused
 
-def load_state() -> dict:
-    """Load intervention state from file."""
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS offense_counts (
+    signature TEXT PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS session_history (
+    ts REAL,
+    signature TEXT,
+    confidence REAL,
+    offense INTEGER
+);
+CREATE TABLE IF NOT EXISTS signature_cache (
+    session_id TEXT PRIMARY KEY,
+    ts REAL,
+    bucket INTEGER,
+    behavior TEXT
+);
+"""
+
+_conn = None
+
+
+def get_state_db() -> sqlite3.Connection:
+    """Open (once per process) the autocommit state DB."""
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(STATE_DB, isolation_level=None, timeout=5)
+        _conn.execute('PRAGMA journal_mode=WAL')
+        _conn.execute('PRAGMA synchronous=NORMAL')
+        _conn.executescript(STATE_SCHEMA)
+        _migrate_json_state(_conn)
+    return _conn
+
+
+def _migrate_json_state(conn: sqlite3.Connection):
+    """Import intervention_state.json from older versions, then retire it."""
+    if not os.path.exists(STATE_FILE):
+        return
+    # The counts are added, not set, so the import must happen exactly once:
+    # IMMEDIATE makes a parallel hook wait here, then find the file retired
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+    except sqlite3.Error:
+        return
+    retired = False
     try:
         if os.path.exists(STATE_FILE):
             with open(STATE_FILE, 'r') as f:
-                return json.load(f)
+                state = json.load(f)
+            conn.executemany(
+                "INSERT INTO offense_counts(signature, count) VALUES(?, ?) "
+                "ON CONFLICT(signature) DO UPDATE SET count = count + excluded.count",
+                state.get('offense_counts', {}).items())
+            conn.executemany(
+                "INSERT INTO session_history(ts, signature, confidence, offense) VALUES(?, ?, ?, ?)",
+                [(0, h.get('signature'), h.get('confidence'), h.get('offense_count'))
+                 for h in state.get('session_history', [])[-HISTORY_LIMIT:]])
+            os.replace(STATE_FILE, STATE_FILE + '.migrated')
+            retired = True
+        conn.execute("COMMIT")
     except Exception:
-        pass
-    return {
-        'offense_counts': {},
-        'last_signature': None,
-        'session_history': []
-    }
+        try:
+            conn.execute("ROLLBACK")
+            if retired:  # nothing was imported; leave the file for the next run
+                os.replace(STATE_FILE + '.migrated', STATE_FILE)
+        except Exception:
+            pass
+
+
+def _tool_call_bucket(conn: sqlite3.Connection, session_id: str):
+    """Tracker samples are recorded every 5 tool calls; the signature can only
+    move when this bucket does. None if the tracker has not run yet."""
+    try:
+        row = conn.execute(
+            "SELECT read + edit + write + bash + test + todo + grep + glob "
+            "FROM tracker WHERE session_id = ?", (session_id,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] // 5 if row else None
+
+
+def get_cached_signature(conn: sqlite3.Connection, session_id: str):
+    """Cached behavior dict for session_id if fresh and the bucket is unchanged."""
+    row = conn.execute(
+        "SELECT ts, bucket, behavior FROM signature_cache WHERE session_id = ?",
+        (session_id,)).fetchone()
+    if not row or time.time() - row[0] > SIGNATURE_TTL:
+        return None
+    if row[1] != _tool_call_bucket(conn, session_id):
+        return None
+    return json.loads(row[2])
 
 
-def save_state(state: dict):
-    """Save intervention state to file."""
+def cache_signature(conn: sqlite3.Connection, session_id: str, behavior: dict):
+    """Cache behavior for session_id, pruning entries past SIGNATURE_TTL.
+
+    One row per session would otherwise accumulate forever; an expired row
+    is never served by get_cached_signature anyway.
+    """
+    now = time.time()
+    bucket = _tool_call_bucket(conn, session_id)
+    conn.execute("BEGIN")  # one WAL commit for the prune and the insert
     try:
-        with open(STATE_FILE, 'w') as f:
-            json.dump(state, f, indent=2)
+        conn.execute("DELETE FROM signature_cache WHERE ts < ?", (now - SIGNATURE_TTL,))
+        conn.execute(
+            "INSERT OR REPLACE INTO signature_cache(session_id, ts, bucket, behavior) VALUES(?, ?, ?, ?)",
+            (session_id, now, bucket, json.dumps(behavior, default=str)))
     except Exception:
-        pass
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
 
 
-def get_intervention_v1(signature: str, confidence: float, history: dict) -> str:
-    """Legacy intervention - basic memento mori messages."""
-    if signature == 'VERIFIER' or confidence < 50:
+def get_offense_count(conn: sqlite3.Connection, signature: str) -> int:
+    row = conn.execute("SELECT count FROM offense_counts WHERE signature = ?", (signature,)).fetchone()
+    return row[0] if row else 0
+
+
+def get_session_history(conn: sqlite3.Connection) -> list:
+    """Last HISTORY_LIMIT interventions, oldest first."""
+    rows = conn.execute(
+        "SELECT signature, confidence, offense FROM session_history ORDER BY rowid DESC LIMIT ?",
+        (HISTORY_LIMIT,)).fetchall()
+    return [{'signature': sig, 'confidence': conf, 'offense_count': offense}
+            for sig, conf, offense in reversed(rows)]
+
+
+def record_offense(conn: sqlite3.Connection, signature: str, confidence: float) -> int:
+    """Increment the offense count for signature and log it; returns the new count."""
+    conn.execute("BEGIN")  # one WAL commit for all three statements
+    try:
+        count = conn.execute(
+            "INSERT INTO offense_counts(signature, count) VALUES(?, 1) "
+            "ON CONFLICT(signature) DO UPDATE SET count = count + 1 RETURNING count",
+            (signature,)).fetchone()[0]
+        rowid = conn.execute(
+            "INSERT INTO session_history(ts, signature, confidence, offense) VALUES(?, ?, ?, ?)",
+            (time.time(), signature, confidence, count)).lastrowid
+        # Ring-buffer eviction: rowids only grow, so everything at or below
+        # rowid - HISTORY_LIMIT has fallen out of the window
+        conn.execute("DELETE FROM session_history WHERE rowid <= ?", (rowid - HISTORY_LIMIT,))
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    return count
+
+
+def read_last_signature():
+    """(age_seconds, session_id, signature) from LAST_SIGNATURE_FILE, or None."""
+    try:
+        age = time.time() - os.stat(LAST_SIGNATURE_FILE).st_mtime
+        with open(LAST_SIGNATURE_FILE, 'r') as f:
+            cached_session, _, signature = f.read().partition('\t')
+    except OSError:
         return None
+    return age, cached_session, signature
 
-    unverified = history.get('unverified_claims', 0)
 
-    if signature == 'COMPLETER':
-        return f"""<system-reminder>
+def remember_signature(session_id: str, signature: str, last):
+    """Record the signature; if unchanged since `last`, only bump the mtime."""
+    try:
+        if last and last[1] == session_id and last[2] == signature:
+            os.utime(LAST_SIGNATURE_FILE)
+            return
+        with open(LAST_SIGNATURE_FILE, 'w') as f:
+            f.write(f"{session_id}\t{signature}")
+    except OSError:
+        pass
+
+
+# Legacy v1 reminders, formatted with confidence and unverified
+_V1_TEMPLATES = {
+    'COMPLETER': """<system-reminder>
 <memento-mori level="warning">
 BEHAVIORAL PATTERN DETECTED: COMPLETER ({confidence:.0f}% confidence)
 You have made {unverified} unverified completion claims.
@@ -60,10 +213,9 @@ BEFORE your next "Done/Fixed/Complete" statement:
 2. Verify the change works as expected
 3. If uncertain, say "Let me verify" instead
 </memento-mori>
-</system-reminder>"""
+</system-reminder>""",
 
-    elif signature == 'SYCOPHANT':
-        return f"""<system-reminder>
+    'SYCOPHANT': """<system-reminder>
 <memento-mori level="warning">
 BEHAVIORAL PATTERN DETECTED: SYCOPHANT ({confidence:.0f}% confidence)
 
@@ -72,10 +224,9 @@ BEFORE agreeing with the user:
 2. If uncertain, investigate first
 3. It is OK to disagree or express uncertainty
 </memento-mori>
-</system-reminder>"""
+</system-reminder>""",
 
-    elif signature == 'THEATER':
-        return f"""<system-reminder>
+    'THEATER': """<system-reminder>
 <memento-mori level="warning">
 BEHAVIORAL PATTERN DETECTED: PREPARATION THEATER ({confidence:.0f}% confidence)
 
@@ -84,9 +235,38 @@ STOP preparing and START executing:
 2. Reduce file reads, increase actual edits
 3. Test after editing, not endless reading
 </memento-mori>
-</system-reminder>"""
+</system-reminder>""",
+}
 
-    return None
+
+def get_intervention_v1(signature: str, confidence: float, history: dict) -> str:
+    """Legacy intervention - basic memento mori messages."""
+    if signature == 'VERIFIER' or confidence < 50:
+        return None
+
+    template = _V1_TEMPLATES.get(signature)
+    if template is None:
+        return None
+    return template.format(confidence=confidence, unverified=history.get('unverified_claims', 0))
+
+
+_generate_full_injection = None  # realignment entry point, resolved once
+
+
+def _realignment_entry():
+    """Import realignment.generate_full_injection once per process.
+
+    A failed import is remembered too (as False), so a missing module costs
+    one sys.path scan rather than one per prompt under hookd.
+    """
+    global _generate_full_injection
+    if _generate_full_injection is None:
+        try:
+            from realignment import generate_full_injection
+            _generate_full_injection = generate_full_injection
+        except Exception:
+            _generate_full_injection = False
+    return _generate_full_injection
 
 
 def get_intervention_v2(signature: str, confidence: float, offense_count: int, session_history: list) -> str:
@@ -94,8 +274,11 @@ def get_intervention_v2(signature: str, confidence: float, offense_count: int, s
     if signature == 'VERIFIER' or signature == 'UNKNOWN' or confidence < 50:
         return None
         
+    generate_full_injection = _realignment_entry()
+    if not generate_full_injection:
+        return None
+
     try:
-        from realignment import generate_full_injection
         injection = generate_full_injection(
             signature=signature,
             confidence=confidence,
@@ -123,27 +306,40 @@ def main():
     # Get session_id from input
     session_id = hook_input.get('session_id', 'default')
 
+    # Cold-start guard: skip the fingerprint DB import on a fresh quiet signature
+    last = read_last_signature()
+    if (last and last[0] <= SIGNATURE_DEBOUNCE and last[1] == session_id
+            and last[2] in QUIET_SIGNATURES):
+        print("Success")
+        return
+
     try:
-        from fingerprint_db import FingerprintDatabase
-        db = FingerprintDatabase()
-        
-        # Use combined signature (tool + text signals)
-        try:
-            behavior = db.get_combined_signature(session_id)
-        except Exception:
-            # Fallback to tool-only signature
-            behavior = db.get_behavioral_signature(session_id)
+        conn = get_state_db()
+        behavior = get_cached_signature(conn, session_id)
+        if behavior is None:
+            from fingerprint_db import FingerprintDatabase
+            db = FingerprintDatabase()
+            
+            # Use combined signature (tool + text signals)
+            try:
+                behavior = db.get_combined_signature(session_id)
+            except Exception:
+                # Fallback to tool-only signature
+                behavior = db.get_behavioral_signature(session_id)
+            cache_signature(conn, session_id, behavior)
             
         signature = behavior.get('signature', 'UNKNOWN')
         confidence = behavior.get('confidence', 0)
+        remember_signature(session_id, signature, last)
         
-        # Load state and track offense counts
-        state = load_state()
-        offense_counts = state.get('offense_counts', {})
-        session_history = state.get('session_history', [])
+        # Neither v1 nor v2 intervenes on these; skip the state lookups
+        if signature in QUIET_SIGNATURES or confidence < 50:
+            print("Success")
+            return
         
-        # Get offense count for this signature
-        offense_count = offense_counts.get(signature, 0)
+        # Look up offense count and recent history for this signature
+        offense_count = get_offense_count(conn, signature)
+        session_history = get_session_history(conn)
         
         # Try v2 (realignment) first, fallback to v1
         intervention = get_intervention_v2(signature, confidence, offense_count, session_history)
@@ -151,21 +347,8 @@ def main():
             intervention = get_intervention_v1(signature, confidence, behavior)
         
         if intervention:
-            # Increment offense count
-            offense_counts[signature] = offense_count + 1
-            session_history.append({
-                'signature': signature,
-                'confidence': confidence,
-                'offense_count': offense_count + 1
-            })
-            # Keep only last 20 entries
-            session_history = session_history[-20:]
-            
-            state['offense_counts'] = offense_counts
-            state['last_signature'] = signature
-            state['session_history'] = session_history
-            save_state(state)
-            
+            # Increment offense count (single UPSERT, no file rewrite)
+            record_offense(conn, signature, confidence)
             print(intervention)
         else:
             print("Success")
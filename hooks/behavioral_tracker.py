@@ -7,100 +7,150 @@ SESSION-ISOLATED: Each session has its own state file and samples.
 """
 
 import json
+import sqlite3
 import sys
 import os
-from datetime import datetime
+import time
 
-sys.path.insert(0, os.path.expanduser('~/.claude'))
+_CLAUDE_DIR = os.path.join(os.path.expanduser('~'), '.claude')
 
-def get_state_file(session_id: str) -> str:
-    """Get session-specific state file path."""
-    if session_id:
-        # Use first 8 chars of session_id for filename
-        short_id = session_id[:8] if len(session_id) > 8 else session_id
-        return os.path.expanduser(f'~/.claude/behavioral_state_{short_id}.json')
-    return os.path.expanduser('~/.claude/behavioral_state.json')
+sys.path.insert(0, _CLAUDE_DIR)
 
-def load_state(session_id: str) -> dict:
-    state_file = get_state_file(session_id)
-    try:
-        with open(state_file, 'r') as f:
-            return json.load(f)
-    except:
-        return {
-            'session_id': session_id,
-            'turn_number': 0,
-            'tool_calls': {
-                'read': 0, 'edit': 0, 'write': 0,
-                'bash': 0, 'test': 0, 'todo': 0,
-                'grep': 0, 'glob': 0
-            },
-            'completion_claims': 0,
-            'unverified_completions': 0,
-            'last_tool': None,
-            'last_was_verification': False
-        }
-
-def save_state(state: dict, session_id: str):
-    state_file = get_state_file(session_id)
-    with open(state_file, 'w') as f:
-        json.dump(state, f, indent=2)
+# Shared hook state store (same file as behavioral_intervention.py)
+STATE_DB = os.path.join(_CLAUDE_DIR, 'state.sqlite')
 
-def main():
-    try:
-        hook_input = json.load(sys.stdin)
-    except:
-        print("Success")
-        return
+# Per-call input log, only written with CLAUDE_HOOK_DEBUG=1
+DEBUG_LOG = '/tmp/posttool_debug.json' if os.environ.get('CLAUDE_HOOK_DEBUG') == '1' else None
 
-    # Extract session_id from hook input (PostToolUse provides this)
-    session_id = hook_input.get('session_id', '')
-    
-    # Debug: write raw input to file (with session info)
-    with open('/tmp/posttool_debug.json', 'a') as f:
-        f.write(json.dumps({'session': session_id[:8] if session_id else 'none', 'tool': hook_input.get('tool_name', '')}) + '\n')
+TOOL_COLUMNS = ('read', 'edit', 'write', 'bash', 'test', 'todo', 'grep', 'glob')
+
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracker (
+    session_id TEXT PRIMARY KEY,
+    turn_number INTEGER DEFAULT 0,
+    read INTEGER DEFAULT 0, edit INTEGER DEFAULT 0, write INTEGER DEFAULT 0,
+    bash INTEGER DEFAULT 0, test INTEGER DEFAULT 0, todo INTEGER DEFAULT 0,
+    grep INTEGER DEFAULT 0, glob INTEGER DEFAULT 0,
+    completion_claims INTEGER DEFAULT 0,
+    unverified_completions INTEGER DEFAULT 0,
+    last_tool TEXT,
+    last_was_verification INTEGER DEFAULT 0,
+    updated REAL
+);
+"""
+
+_conn = None
+
+
+def get_state_db() -> sqlite3.Connection:
+    """Open (once per process) the autocommit state DB."""
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(STATE_DB, isolation_level=None, timeout=5)
+        _conn.execute('PRAGMA journal_mode=WAL')
+        _conn.execute('PRAGMA synchronous=NORMAL')
+        _conn.executescript(STATE_SCHEMA)
+    return _conn
 
-    # PostToolUse format: tool_name is at top level
-    tool_name = hook_input.get('tool_name', '').lower()
-    state = load_state(session_id)
 
-    # Track tool call
+STATE_COLUMNS = ('turn_number',) + TOOL_COLUMNS + (
+    'completion_claims', 'unverified_completions', 'last_tool', 'last_was_verification')
+
+
+def classify_tool(tool_name: str, tool_input: dict) -> tuple:
+    """Map a tool call to (counter column, is_verification); (None, None) if untracked."""
     if 'read' in tool_name:
-        state['tool_calls']['read'] += 1
-        state['last_was_verification'] = True
+        return 'read', True
     elif 'edit' in tool_name:
-        state['tool_calls']['edit'] += 1
-        state['last_was_verification'] = False
+        return 'edit', False
     elif 'write' in tool_name:
-        state['tool_calls']['write'] += 1
-        state['last_was_verification'] = False
+        return 'write', False
     elif 'bash' in tool_name:
-        cmd = hook_input.get('tool_input', {}).get('command', '').lower()
+        cmd = tool_input.get('command', '').lower()
         if any(x in cmd for x in ['test', 'pytest', 'npm test', 'cargo test']):
-            state['tool_calls']['test'] += 1
-            state['last_was_verification'] = True
+            return 'test', True
         elif any(x in cmd for x in ['snippet_patch', '> ', '>> ', 'echo "', "echo '"]):
-            state['tool_calls']['edit'] += 1
-            state['last_was_verification'] = False
+            return 'edit', False
         elif any(x in cmd for x in ['cat ', 'head ', 'tail ', 'grep ', 'ls ', 'find ']):
-            state['tool_calls']['read'] += 1
-            state['last_was_verification'] = True
-        else:
-            state['tool_calls']['bash'] += 1
-            state['last_was_verification'] = False
+            return 'read', True
+        return 'bash', False
     elif 'todo' in tool_name:
-        state['tool_calls']['todo'] += 1
-        state['last_was_verification'] = False
+        return 'todo', False
     elif 'grep' in tool_name:
-        state['tool_calls']['grep'] += 1
-        state['last_was_verification'] = True
+        return 'grep', True
     elif 'glob' in tool_name:
-        state['tool_calls']['glob'] += 1
-        state['last_was_verification'] = True
+        return 'glob', True
+    return None, None
+
+
+def record_tool_call(session_id: str, tool_name: str, column: str, verification: bool) -> dict:
+    """Bump the session's counter and return its updated state in one statement.
+
+    The UPSERT ... RETURNING replaces the old load/mutate/save round-trip,
+    so concurrent hooks can no longer lose each other's increments.
+    """
+    updates = []
+    if column:
+        updates.append(f"{column} = {column} + 1")
+    if verification is not None:
+        updates.append("last_was_verification = excluded.last_was_verification")
+    updates += ["last_tool = excluded.last_tool", "updated = excluded.updated"]
+    row = get_state_db().execute(
+        f"INSERT INTO tracker (session_id, {', '.join(TOOL_COLUMNS)}, last_tool, last_was_verification, updated) "
+        f"VALUES (?, {', '.join('?' * len(TOOL_COLUMNS))}, ?, ?, ?) "
+        f"ON CONFLICT(session_id) DO UPDATE SET {', '.join(updates)} "
+        f"RETURNING {', '.join(STATE_COLUMNS)}",
+        (session_id, *(int(c == column) for c in TOOL_COLUMNS), tool_name,
+         int(bool(verification)), time.time())).fetchone()
+    return {
+        'session_id': session_id,
+        'turn_number': row[0],
+        'tool_calls': dict(zip(TOOL_COLUMNS, row[1:9])),
+        'completion_claims': row[9],
+        'unverified_completions': row[10],
+        'last_tool': row[11],
+        'last_was_verification': bool(row[12])
+    }
+
+def compute_ratios(tc: dict) -> tuple:
+    """(verification_ratio, preparation_ratio), each clamped to 1.0.
+
+    A ratio with no edits (or edits+bash) in the denominator is 1.0.
+    """
+    edit_like = tc['edit'] + tc['write']
+    acting = tc['edit'] + tc['bash']
+    ver = min(1.0, (tc['read'] + tc['grep'] + tc['glob']) / edit_like) if edit_like else 1.0
+    prep = min(1.0, (tc['read'] + tc['todo']) / acting) if acting else 1.0
+    return ver, prep
+
+def debug_log(entry: dict):
+    """Append one line to DEBUG_LOG with a single O_APPEND write."""
+    try:
+        fd = os.open(DEBUG_LOG, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, (json.dumps(entry) + '\n').encode())
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+def main():
+    try:
+        hook_input = json.load(sys.stdin)
+    except:
+        print("Success")
+        return
 
-    state['last_tool'] = tool_name
-    state['session_id'] = session_id
-    save_state(state, session_id)
+    # Extract session_id from hook input (PostToolUse provides this)
+    session_id = hook_input.get('session_id', '')
+    
+    if DEBUG_LOG:
+        debug_log({'session': session_id[:8] if session_id else 'none', 'tool': hook_input.get('tool_name', '')})
+
+    # PostToolUse format: tool_name is at top level
+    tool_name = hook_input.get('tool_name', '').lower()
+    column, verification = classify_tool(tool_name, hook_input.get('tool_input', {}))
+    state = record_tool_call(session_id, tool_name, column, verification)
 
     # Record sample periodically (every 5 tool calls)
     total_calls = sum(state['tool_calls'].values())
@@ -110,11 +160,7 @@ def main():
             db = FingerprintDatabase()
 
             tc = state['tool_calls']
-            read_like = tc['read'] + tc['grep'] + tc['glob']
-            edit_like = tc['edit'] + tc['write']
-
-            ver_ratio = read_like / max(1, edit_like) if edit_like > 0 else 1.0
-            prep_ratio = (tc['read'] + tc['todo']) / max(1, tc['edit'] + tc['bash']) if (tc['edit'] + tc['bash']) > 0 else 1.0
+            ver_ratio, prep_ratio = compute_ratios(tc)
 
             db.record_behavioral_sample({
                 'session_id': session_id,
@@ -125,8 +171,8 @@ def main():
                 'bash_calls': tc['bash'],
                 'test_calls': tc['test'],
                 'todo_calls': tc['todo'],
-                'verification_ratio': min(1.0, ver_ratio),
-                'preparation_ratio': min(1.0, prep_ratio),
+                'verification_ratio': ver_ratio,
+                'preparation_ratio': prep_ratio,
                 'unverified_completions': state['unverified_completions'],
                 'completion_claims': state['completion_claims'],  # FIX: Was missing!
             })
@@ -21,8 +21,21 @@ import json
 import sys
 import os
 import re
+import hashlib
 from pathlib import Path
-from fnmatch import fnmatch
+from fnmatch import fnmatch, translate
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 # Sensitive path patterns
 SENSITIVE_PATHS = [
@@ -88,6 +101,73 @@ DANGEROUS_COMMANDS = [
     (r"\binit\s+0", "System halt"),
 ]
 
+# All dangerous patterns unioned into one alternation, compiled once; the
+# named group g<i> that matched maps back to DANGEROUS_COMMANDS[i]
+_DANGEROUS_RE = re.compile(
+    "|".join(f"(?P<g{i}>{pattern})" for i, (pattern, _) in enumerate(DANGEROUS_COMMANDS)),
+    re.IGNORECASE)
+_DANGEROUS_REASONS = [reason for _, reason in DANGEROUS_COMMANDS]
+
+# Serialized Hyperscan database, keyed by a hash of the patterns so an edit to
+# DANGEROUS_COMMANDS never reuses a stale compile
+HS_CACHE = Path.home() / ".claude" / "hs.db"
+
+
+def _load_hyperscan_db():
+    """Load the cached Hyperscan database or compile it; None if unusable."""
+    if not HYPERSCAN_AVAILABLE:
+        return None
+    key = hashlib.sha256(repr(DANGEROUS_COMMANDS).encode()).digest()
+    try:
+        blob = HS_CACHE.read_bytes()
+        if blob[:len(key)] == key:
+            return hyperscan.loadb(blob[len(key):])
+    except (OSError, hyperscan.error):
+        pass
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[p.encode() for p, _ in DANGEROUS_COMMANDS],
+            ids=list(range(len(DANGEROUS_COMMANDS))),
+            flags=[hyperscan.HS_FLAG_CASELESS] * len(DANGEROUS_COMMANDS),
+        )
+    except hyperscan.error:
+        return None
+    try:
+        HS_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        HS_CACHE.write_bytes(key + hyperscan.dumpb(db))
+    except (OSError, hyperscan.error):
+        pass
+    return db
+
+
+_HS_DB = _load_hyperscan_db()
+
+# Substrings at least one of which appears in any command that can reach a
+# SENSITIVE_PATHS match; "~" and "$" cover paths that only match once expanded
+_SENSITIVE_LITERAL_PREFIXES = (
+    '/etc/', '/usr/', '/var/', '/boot/', '/root/',
+    '.ssh', '.gnupg', '.aws', 'gcloud', '.kube',
+    '.env', 'secret', 'credentials', '_key', '.pem', '.key', 'id_rsa', 'id_ed25519',
+    '~', '$',
+)
+
+# Verbs the bash file-op tokenizer keys on; without one of them re.findall
+# can't produce a path
+_FILE_OP_KEYWORDS = ('cat', 'echo', 'rm', 'cp', 'mv', '>')
+
+if AHOCORASICK_AVAILABLE:
+    _FILE_OP_AUTOMATON = ahocorasick.Automaton()
+    for _kw in _FILE_OP_KEYWORDS:
+        _FILE_OP_AUTOMATON.add_word(_kw, _kw)
+    _FILE_OP_AUTOMATON.make_automaton()
+
+    def has_file_op_keyword(command: str) -> bool:
+        return next(_FILE_OP_AUTOMATON.iter(command), None) is not None
+else:
+    def has_file_op_keyword(command: str) -> bool:
+        return any(kw in command for kw in _FILE_OP_KEYWORDS)
+
 # Whitelist - allowed despite matching sensitive patterns
 WHITELIST = [
     # Reading is generally safe
@@ -102,6 +182,17 @@ def expand_path(path: str) -> str:
     return os.path.expanduser(os.path.expandvars(path))
 
 
+# SENSITIVE_PATHS paired with their expansion; ~ and $VARS are resolved once
+_SENSITIVE_EXPANDED = [(p, expand_path(p)) for p in SENSITIVE_PATHS]
+
+# SENSITIVE_PATHS as two precompiled unions: full-path globs, and the
+# basename suffixes of the "**/" patterns
+_SENSITIVE_PATH_RE = re.compile(
+    "|".join(f"(?:{translate(expanded)})" for _, expanded in _SENSITIVE_EXPANDED))
+_SENSITIVE_BASENAME_RE = re.compile(
+    "|".join(f"(?:{translate(p.replace('**/', ''))})" for p in SENSITIVE_PATHS if "**" in p))
+
+
 def matches_sensitive_path(file_path: str) -> tuple:
     """
     Check if path matches any sensitive pattern.
@@ -112,9 +203,13 @@ def matches_sensitive_path(file_path: str) -> tuple:
     
     expanded = expand_path(file_path)
     
-    for pattern in SENSITIVE_PATHS:
-        expanded_pattern = expand_path(pattern)
-        
+    # One regex scan decides the common no-match case; the per-pattern loop
+    # below only runs on a hit to report which pattern matched
+    if not (_SENSITIVE_PATH_RE.match(expanded)
+            or _SENSITIVE_BASENAME_RE.match(os.path.basename(expanded))):
+        return False, None
+    
+    for pattern, expanded_pattern in _SENSITIVE_EXPANDED:
         # Handle ** glob patterns
         if "**" in pattern:
             # Simple ** matching - check if file matches the suffix
@@ -138,9 +233,26 @@ def check_dangerous_command(command: str) -> tuple:
     if not command:
         return False, None
     
-    for pattern, reason in DANGEROUS_COMMANDS:
-        if re.search(pattern, command, re.IGNORECASE):
-            return True, reason
+    if _HS_DB is not None:
+        hits = []
+
+        def on_match(pattern_id, start, end, flags, context):
+            hits.append(pattern_id)
+            return True  # stop at the first hit
+
+        try:
+            # surrogatepass: json.load can hand us lone surrogates such as "\ud83d"
+            _HS_DB.scan(command.encode("utf-8", "surrogatepass"), match_event_handler=on_match)
+            return False, None
+        except hyperscan.error:
+            # The callback's early stop raises too. Any other failure (scratch,
+            # database, mode) must not approve: fall through to the re scan
+            if hits:
+                return True, _DANGEROUS_REASONS[hits[0]]
+
+    m = _DANGEROUS_RE.search(command)
+    if m:
+        return True, _DANGEROUS_REASONS[int(m.lastgroup[1:])]
     
     return False, None
 
@@ -189,6 +301,13 @@ def main():
             print(json.dumps(result))
             return
         
+        # Cheap substring checks before tokenizing: most commands have no
+        # file-op verb or can't touch a sensitive path at all
+        if (not has_file_op_keyword(command)
+                or not any(tok in command for tok in _SENSITIVE_LITERAL_PREFIXES)):
+            print("Approved")
+            return
+        
         # Check for file operations in bash targeting sensitive paths
         # Look for common patterns: cat, echo >, rm, cp, mv to sensitive paths
         file_ops = re.findall(r'(?:cat|echo|rm|cp|mv|>+)\s+([^\s|&;]+)', command)
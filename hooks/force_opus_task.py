@@ -7,39 +7,56 @@ Proxy also blocks (BLOCK_NON_OPUS=1) as second safety net.
 import json
 import sys
 
+try:
+    import orjson
+    _loads = orjson.loads
+
+    def _dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    _loads = json.loads
+
+    def _dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+_REJECT_TPL = (
+    "REJECTED: model=\"{model}\" is FORBIDDEN. OPUS ONLY.\n"
+    "\n"
+    "DO NOT fall back to inline execution. RETRY THIS EXACT CALL with model=\"opus\":\n"
+    "\n"
+    "  Task(\n"
+    "    description=\"{desc}\",\n"
+    "    prompt=\"...same prompt...\",\n"
+    "    subagent_type=\"{agent}\",\n"
+    "    model=\"opus\"\n"
+    "  )\n"
+    "\n"
+    "This is a MANDATORY retry. Do NOT proceed without launching the subagent as opus."
+)
+
+_APPROVE = _dumps_bytes({"decision": "approve"}) + b"\n"
+
+
 def main():
+    out = sys.stdout.buffer
     try:
-        data = json.load(sys.stdin)
+        data = _loads(sys.stdin.buffer.read())
         tool_input = data.get("tool_input", {})
         model = tool_input.get("model", "").lower()
 
         if model in ("haiku", "sonnet"):
             # Extract the original call details for retry
             desc = tool_input.get("description", "")
-            prompt = tool_input.get("prompt", "")[:200]
             agent = tool_input.get("subagent_type", "general-purpose")
 
-            print(json.dumps({
+            out.write(_dumps_bytes({
                 "decision": "block",
-                "reason": (
-                    f"REJECTED: model=\"{model}\" is FORBIDDEN. OPUS ONLY.\n"
-                    f"\n"
-                    f"DO NOT fall back to inline execution. RETRY THIS EXACT CALL with model=\"opus\":\n"
-                    f"\n"
-                    f"  Task(\n"
-                    f"    description=\"{desc}\",\n"
-                    f"    prompt=\"...same prompt...\",\n"
-                    f"    subagent_type=\"{agent}\",\n"
-                    f"    model=\"opus\"\n"
-                    f"  )\n"
-                    f"\n"
-                    f"This is a MANDATORY retry. Do NOT proceed without launching the subagent as opus."
-                )
-            }))
+                "reason": _REJECT_TPL.format(model=model, desc=desc, agent=agent)
+            }) + b"\n")
         else:
-            print(json.dumps({"decision": "approve"}))
+            out.write(_APPROVE)
     except Exception as e:
-        print(json.dumps({"decision": "approve"}))
+        out.write(_APPROVE)
 
 if __name__ == "__main__":
     main()
@@ -1,29 +1,51 @@
 #!/usr/bin/env python3
-"""Force sequential thinking when enabled via /think skill."""
+"""Force sequential thinking when enabled via /think skill.
+
+The on/off switch is the existence of ~/.claude/sequential_thinking.on.
+A legacy sequential_thinking_state.json ({"enabled": bool}) is folded into
+the sentinel whenever it appears, then retired.
+"""
 import json
+import os
 import sys
 from pathlib import Path
 
-STATE_FILE = Path.home() / ".claude" / "sequential_thinking_state.json"
+_CLAUDE_DIR = Path.home() / ".claude"
+
+SENTINEL = _CLAUDE_DIR / "sequential_thinking.on"
+# Legacy JSON state, migrated into SENTINEL
+STATE_FILE = _CLAUDE_DIR / "sequential_thinking_state.json"
+
+
+def _migrate_json_state():
+    """Apply the legacy JSON flag to the sentinel, then move the JSON aside."""
+    try:
+        enabled = json.loads(STATE_FILE.read_text()).get("enabled", False)
+    except:
+        enabled = False
+    try:
+        if enabled:
+            SENTINEL.touch()
+        elif SENTINEL.exists():
+            SENTINEL.unlink()
+        os.replace(STATE_FILE, str(STATE_FILE) + ".migrated")
+    except OSError:
+        pass
+
 
 def main():
-    # Check if sequential thinking is enabled
-    enabled = False
     if STATE_FILE.exists():
-        try:
-            state = json.loads(STATE_FILE.read_text())
-            enabled = state.get("enabled", False)
-        except:
-            pass
-    
-    if enabled:
+        _migrate_json_state()
+
+    # Check if sequential thinking is enabled
+    if SENTINEL.exists():
         result = {
             "continue": True,
             "message": "<system-reminder>SEQUENTIAL THINKING MODE ACTIVE: You MUST use mcp__sequential-thinking__sequentialthinking tool for this response. Begin with thought 1 of N.</system-reminder>"
         }
     else:
         result = {"continue": True}
-    
+
     print(json.dumps(result))
 
 if __name__ == "__main__":
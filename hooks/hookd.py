@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+claude-hookd: keep the hook scripts resident behind a unix socket.
+
+Every hook invocation otherwise pays interpreter startup plus imports
+(fingerprint_db, realignment, compiled regex tables, state DB connection).
+The daemon imports each hook once and runs its main() per request;
+hookd_client.sh forwards a hook's stdin here and prints the reply, falling
+back to running the hook script directly when the daemon is not up.
+
+Protocol (one request per connection): "<hook name>\\n<stdin bytes>", client
+half-closes, daemon replies with the hook's stdout and closes. Once a hook
+is accepted the daemon always replies (its pass-through output if main()
+fails), so the client never runs a request the daemon already took.
+Only an unknown hook name gets UNKNOWN_HOOK, telling the client to run
+the script itself.
+
+Usage: python3 hookd.py            # serves ~/.claude/hookd.sock
+"""
+
+import importlib
+import io
+import os
+import socket
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SOCKET_PATH = os.environ.get('CLAUDE_HOOKD_SOCK', os.path.expanduser('~/.claude/hookd.sock'))
+HOOKS = (
+    'behavioral_intervention',
+    'behavioral_tracker',
+    'file_approval',
+    'force_opus_task',
+    'force_sequential',
+)
+RECV_TIMEOUT = 5  # seconds to wait for a client's stdin
+UNKNOWN_HOOK = b'hookd:unknown-hook'  # must match hookd_client.sh
+# What each hook prints when it lets the call through unchanged
+PASS_THROUGH = {
+    'behavioral_intervention': b'Success\n',
+    'behavioral_tracker': b'Success\n',
+    'file_approval': b'Approved\n',
+    'force_opus_task': b'{"decision": "approve"}\n',
+    'force_sequential': b'{"continue": true}\n',
+}
+
+
+def load_hooks() -> dict:
+    """Import every hook (and what it imports) once, up front."""
+    modules = {}
+    for name in HOOKS:
+        try:
+            modules[name] = importlib.import_module(name)
+        except Exception as e:
+            print(f"[hookd] {name} unavailable: {e}", file=sys.stderr)
+    # Hooks import fingerprint_db lazily; warm it here instead
+    try:
+        import fingerprint_db  # noqa: F401
+    except ImportError:
+        pass
+    return modules
+
+
+def run_hook(module, payload: bytes) -> bytes:
+    """Run module.main() with payload as stdin; return what it wrote to stdout."""
+    stdin = io.TextIOWrapper(io.BytesIO(payload), encoding='utf-8')
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding='utf-8', write_through=True)
+    real_stdin, real_stdout = sys.stdin, sys.stdout
+    sys.stdin, sys.stdout = stdin, stdout
+    try:
+        module.main()
+    except SystemExit:
+        pass
+    finally:
+        sys.stdin, sys.stdout = real_stdin, real_stdout
+    stdout.flush()
+    return stdout.buffer.getvalue()
+
+
+def read_request(conn: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
+
+
+def serve(modules: dict):
+    if os.path.exists(SOCKET_PATH):
+        os.unlink(SOCKET_PATH)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)  # socket is owner-only
+    try:
+        server.bind(SOCKET_PATH)
+    finally:
+        os.umask(old_umask)
+    server.listen(16)
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                try:
+                    conn.settimeout(RECV_TIMEOUT)
+                    name, _, payload = read_request(conn).partition(b'\n')
+                    hook = name.decode('utf-8', 'replace').strip()
+                    module = modules.get(hook)
+                    if module is None:
+                        conn.sendall(UNKNOWN_HOOK)
+                        continue
+                    try:
+                        reply = run_hook(module, payload)
+                    except Exception as e:
+                        print(f"[hookd] {hook} failed: {e}", file=sys.stderr)
+                        reply = PASS_THROUGH.get(hook, b'')
+                    conn.sendall(reply)
+                except Exception as e:
+                    print(f"[hookd] request failed: {e}", file=sys.stderr)
+    finally:
+        server.close()
+        if os.path.exists(SOCKET_PATH):
+            os.unlink(SOCKET_PATH)
+
+
+def main():
+    try:
+        serve(load_hooks())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
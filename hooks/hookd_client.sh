@@ -0,0 +1,27 @@
+#!/usr/bin/env bash
+# Forward a hook's stdin to claude-hookd (hookd.py) and print its reply.
+# Falls back to running the hook script directly only when the daemon
+# cannot be reached (no socket, socat missing, connect refused) or does
+# not know the hook. Once connected, the daemon owns the request: an empty
+# reply (socat timed out, or the hook printed nothing) is never retried,
+# since that would run the hook twice.
+#
+# Usage in settings.json:  hookd_client.sh <hook name>   e.g. file_approval
+
+HOOK="$1"
+SOCK="${CLAUDE_HOOKD_SOCK:-$HOME/.claude/hookd.sock}"
+DIR="$(cd "$(dirname "$0")" && pwd)"
+UNKNOWN_HOOK="hookd:unknown-hook"  # must match hookd.py
+INPUT="$(cat)"
+
+if [ -S "$SOCK" ] && command -v socat >/dev/null 2>&1; then
+    if REPLY="$(printf '%s\n%s' "$HOOK" "$INPUT" | socat -t 5 - "UNIX-CONNECT:$SOCK" 2>/dev/null)" \
+            && [ "$REPLY" != "$UNKNOWN_HOOK" ]; then
+        if [ -n "$REPLY" ]; then
+            printf '%s\n' "$REPLY"
+        fi
+        exit 0
+    fi
+fi
+
+printf '%s' "$INPUT" | exec python3 "$DIR/$HOOK.py"
@@ -5,7 +5,6 @@ View detection stats, test patterns, and manage state
 """
 
 import argparse
-import json
 import sys
 import os
 from datetime import datetime
@@ -17,8 +16,8 @@ from detector import analyze_response
 from whispers import get_whisper, format_as_system_reminder
 from state import load_state, reset_state, get_session_id
 from db import (
-    get_recent_detections, get_session_stats, get_signal_frequency,
-    get_rolling_stats, get_cross_session_escalation, search_detections,
+    iter_recent_detections, get_session_stats, get_signal_frequency,
+    get_rolling_stats, get_cross_session_escalation, iter_search_detections,
     export_for_memory
 )
 
@@ -42,23 +41,29 @@ def cmd_stats(args):
     state = load_state()
     print(f"Session ID: {state.session_id}")
     print(f"Detection count: {state.detection_count}")
-    print(f"Recent signals: {', '.join(state.signals_history[-5:]) if state.signals_history else 'none'}")
+    print(f"Recent signals: {', '.join(list(state.signals_history)[-5:]) if state.signals_history else 'none'}")
 
 
-def cmd_recent(args):
-    """Show recent detections"""
-    detections = get_recent_detections(args.limit)
-
-    print(f"\n=== Last {len(detections)} Detections ===\n")
-
-    for d in detections:
+def print_detections(rows) -> int:
+    """Print detection rows as they stream in; returns how many were printed"""
+    count = 0
+    for d in rows:
         ts = datetime.fromtimestamp(d['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
-        signals = json.loads(d['signals']) if d['signals'] else []
 
         print(f"[{ts}] Score: {d['score']:.2f} | Level: {d['level']}")
-        print(f"  Signals: {', '.join(signals)}")
+        print(f"  Signals: {d['signal_text'] or ''}")
         print(f"  Snippet: {d['response_snippet'][:100]}...")
         print()
+        count += 1
+    return count
+
+
+def cmd_recent(args):
+    """Show recent detections"""
+    print(f"\n=== Last {args.limit} Detections ===\n")
+
+    count = print_detections(iter_recent_detections(args.limit))
+    print(f"({count} shown)")
 
 
 def cmd_test(args):
@@ -125,18 +130,10 @@ def cmd_memory(args):
 
 def cmd_search(args):
     """Search detection history"""
-    results = search_detections(args.query, args.limit)
-
-    print(f"\n=== Search: '{args.query}' ({len(results)} results) ===\n")
-
-    for d in results:
-        ts = datetime.fromtimestamp(d['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
-        signals = json.loads(d['signals']) if d['signals'] else []
+    print(f"\n=== Search: '{args.query}' ===\n")
 
-        print(f"[{ts}] Score: {d['score']:.2f} | Level: {d['level']}")
-        print(f"  Signals: {', '.join(signals)}")
-        print(f"  Snippet: {d['response_snippet'][:100]}...")
-        print()
+    count = print_detections(iter_search_detections(args.query, args.limit))
+    print(f"({count} results)")
 
 
 def cmd_export(args):
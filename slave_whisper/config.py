@@ -85,17 +85,19 @@ STATE_FILE = os.path.join(_SCRIPT_DIR, ".session_state.json")
 DB_FILE = os.path.join(_SCRIPT_DIR, "detections.db")
 
 
-def compile_patterns() -> Dict[str, List[Pattern]]:
-    """Pre-compile all regex patterns for performance"""
-    compiled = {}
-    for category, patterns in SYCOPHANCY_PATTERNS.items():
-        compiled[category] = [re.compile(p, re.IGNORECASE) for p in patterns]
-    return compiled
+def _union(patterns: List[str]) -> Pattern:
+    """One alternation for a category: a single C-level scan per category.
 
+    The patterns are plain ASCII, so ASCII mode skips Unicode case folding.
+    """
+    return re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE | re.ASCII)
 
-def compile_rigor_patterns() -> Dict[str, List[Pattern]]:
-    """Pre-compile rigor patterns"""
-    compiled = {}
-    for category, patterns in RIGOR_PATTERNS.items():
-        compiled[category] = [re.compile(p, re.IGNORECASE) for p in patterns]
-    return compiled
+
+def compile_patterns() -> Dict[str, Pattern]:
+    """Pre-compile sycophancy patterns, one alternation per category"""
+    return {category: _union(patterns) for category, patterns in SYCOPHANCY_PATTERNS.items()}
+
+
+def compile_rigor_patterns() -> Dict[str, Pattern]:
+    """Pre-compile rigor patterns, one alternation per category"""
+    return {category: _union(patterns) for category, patterns in RIGOR_PATTERNS.items()}
@@ -3,22 +3,66 @@ Slave Whisper Database
 SQLite logging for detection events
 """
 
+import atexit
+import functools
+import logging
+import queue
 import sqlite3
 import json
+import threading
 import time
 import uuid
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional
 from dataclasses import dataclass
 
 from config import DB_FILE
 
+# orjson (optional) encodes the signal lists several times faster than json.
+# Columns stay TEXT (not BLOB) so json_each, FTS and LIKE keep working on them.
+try:
+    import orjson
+    _loads = orjson.loads
 
-def init_db() -> None:
-    """Initialize database schema"""
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj) -> str:
+        return json.dumps(obj)
+
+
+_conn = None
+
+
+def _connect() -> sqlite3.Connection:
+    """New autocommit, WAL-mode connection to the detections DB"""
     Path(DB_FILE).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DB_FILE, isolation_level=None, check_same_thread=False)
+    conn.executescript("""
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+    """)
+    return conn
+
 
-    conn = sqlite3.connect(DB_FILE)
+def _get_conn() -> sqlite3.Connection:
+    """Open (once per process) the shared connection, creating the schema"""
+    global _conn
+    if _conn is None:
+        _conn = _connect()
+        _init_schema(_conn)
+    return _conn
+
+
+def init_db() -> None:
+    """Initialize database schema (done once, when the connection opens)"""
+    _get_conn()
+
+
+def _init_schema(conn: sqlite3.Connection) -> None:
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -45,11 +89,246 @@ def init_db() -> None:
         CREATE INDEX IF NOT EXISTS idx_timestamp ON detections(timestamp)
     """)
 
-    conn.commit()
+    _init_signals(conn)
+    _init_fts(conn)
+
+
+def _init_signals(conn: sqlite3.Connection) -> None:
+    """One row per (detection, signal) so frequencies are a GROUP BY in SQL"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'detection_signals'").fetchone()
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS detection_signals (
+            detection_id TEXT,
+            signal TEXT,
+            timestamp REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_signal_ts ON detection_signals(signal, timestamp);
+    """)
+    if not exists:
+        # Split the JSON signal lists of rows logged before this table existed
+        conn.execute("""
+            INSERT INTO detection_signals (detection_id, signal, timestamp)
+            SELECT d.id, j.value, d.timestamp
+            FROM detections d, json_each(d.signals) j
+            WHERE json_valid(d.signals)
+        """)
+
+
+_fts_available = False
+
+
+def _init_fts(conn: sqlite3.Connection) -> None:
+    """Trigram FTS5 index over snippet + signals, kept in sync by triggers.
+
+    Trigram tokens let MATCH answer the same substring queries LIKE did,
+    from the index. Skipped (search falls back to LIKE) without FTS5.
+    """
+    global _fts_available
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'detections_fts'").fetchone()
+    try:
+        conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS detections_fts USING fts5(
+                response_snippet, signals,
+                content='detections', content_rowid='rowid', tokenize='trigram'
+            );
+            CREATE TRIGGER IF NOT EXISTS detections_fts_ai AFTER INSERT ON detections BEGIN
+                INSERT INTO detections_fts(rowid, response_snippet, signals)
+                VALUES (new.rowid, new.response_snippet, new.signals);
+            END;
+            CREATE TRIGGER IF NOT EXISTS detections_fts_ad AFTER DELETE ON detections BEGIN
+                INSERT INTO detections_fts(detections_fts, rowid, response_snippet, signals)
+                VALUES ('delete', old.rowid, old.response_snippet, old.signals);
+            END;
+            CREATE TRIGGER IF NOT EXISTS detections_fts_au AFTER UPDATE ON detections BEGIN
+                INSERT INTO detections_fts(detections_fts, rowid, response_snippet, signals)
+                VALUES ('delete', old.rowid, old.response_snippet, old.signals);
+                INSERT INTO detections_fts(rowid, response_snippet, signals)
+                VALUES (new.rowid, new.response_snippet, new.signals);
+            END;
+        """)
+        if not exists:
+            # Index rows logged before the FTS table existed
+            conn.execute("INSERT INTO detections_fts(detections_fts) VALUES ('rebuild')")
+    except sqlite3.OperationalError:
+        return
+    _fts_available = True
+
+
+# Kept as one constant string so the connection's statement cache reuses the
+# prepared INSERT on every call
+_INSERT_DETECTION = """
+    INSERT INTO detections (
+        id, timestamp, session_id, score, level, signals,
+        rigor_present, rigor_missing, response_snippet,
+        escalation_count, whisper_injected
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+# Background writer: log_detection only enqueues, so the hook never waits
+# on disk. Rows are committed in batches, and atexit flushes what's left.
+_WRITE_QUEUE_MAX = 1024      # Drop-oldest beyond this backlog
+_COMMIT_BATCH = 50           # Commit after this many detections...
+_COMMIT_INTERVAL = 0.5       # ...or once the oldest uncommitted one is this old (seconds)
+_STOP = object()
+_WRITE_Q: "queue.Queue" = queue.Queue(maxsize=_WRITE_QUEUE_MAX)
+_writer_thread = None
+_writer_lock = threading.Lock()
+_log = logging.getLogger(__name__)
+
+
+_INSERT_SIGNAL = "INSERT INTO detection_signals (detection_id, signal, timestamp) VALUES (?, ?, ?)"
+
+
+def _insert_detections(conn: sqlite3.Connection, items: List[tuple]) -> None:
+    """Insert (row, signals) items with one executemany per table"""
+    conn.executemany(_INSERT_DETECTION, [row for row, _ in items])
+    conn.executemany(_INSERT_SIGNAL, [
+        (row[0], signal, row[1]) for row, signals in items for signal in signals])
+
+
+def _write_batch(conn: sqlite3.Connection, items: List[tuple]) -> int:
+    """Insert a batch; if any row fails, fall back to row by row and skip the bad ones.
+
+    Returns how many items were written.
+    """
+    written = len(items)
+    conn.execute("SAVEPOINT batch")
+    try:
+        _insert_detections(conn, items)
+    except sqlite3.Error:
+        conn.execute("ROLLBACK TO batch")
+        written = 0
+        for item in items:
+            try:
+                _insert_detections(conn, [item])
+                written += 1
+            except sqlite3.Error as e:
+                _log.error("Dropped detection %s: %s", item[0][0], e)
+    conn.execute("RELEASE batch")
+    return written
+
+
+def _rollback(conn: sqlite3.Connection) -> None:
+    """End a failed batch transaction so the next BEGIN starts clean"""
+    if conn.in_transaction:
+        try:
+            conn.execute("ROLLBACK")
+        except sqlite3.Error:
+            pass
+
+
+_OPEN_ATTEMPTS = 3  # Writer connection attempts before it gives up for now
+
+
+def _open_writer_conn() -> Optional[sqlite3.Connection]:
+    """_connect() with a short backoff (e.g. "database is locked" during the WAL pragma)"""
+    for attempt in range(1, _OPEN_ATTEMPTS + 1):
+        try:
+            return _connect()
+        except sqlite3.Error as e:
+            if attempt == _OPEN_ATTEMPTS:
+                _log.error("Detections writer could not open %s: %s", DB_FILE, e)
+                return None
+            time.sleep(0.1 * attempt)
+
+
+def _db_writer() -> None:
+    """Drain _WRITE_Q into SQLite, committing in batches.
+
+    If the DB can't be opened the thread unregisters itself and leaves the
+    queue as is: the next log call starts a fresh writer, and flush() makes
+    a last attempt at exit.
+    """
+    global _writer_thread
+    conn = _open_writer_conn()
+    if conn is None:
+        with _writer_lock:
+            if _writer_thread is threading.current_thread():
+                _writer_thread = None
+        return
+    pending = 0
+    first_pending = 0.0
+    stopping = False
+    while not stopping:
+        try:
+            item = _WRITE_Q.get(timeout=_COMMIT_INTERVAL if conn.in_transaction else None)
+        except queue.Empty:
+            item = None
+        # Take whatever else is already queued, up to one commit's worth
+        batch = []
+        while item is not None:
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+            if len(batch) >= _COMMIT_BATCH:
+                break
+            try:
+                item = _WRITE_Q.get_nowait()
+            except queue.Empty:
+                item = None
+        if batch:
+            try:
+                if not conn.in_transaction:
+                    conn.execute("BEGIN")
+                    first_pending = time.monotonic()
+                pending += _write_batch(conn, batch)
+            except sqlite3.Error as e:
+                _log.error("Dropped %d detection(s): %s", pending + len(batch), e)
+                _rollback(conn)
+                pending = 0
+        if conn.in_transaction and (not batch or stopping or pending >= _COMMIT_BATCH
+                                    or time.monotonic() - first_pending >= _COMMIT_INTERVAL):
+            try:
+                conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                _log.error("Dropped %d detection(s): %s", pending, e)
+                _rollback(conn)
+            pending = 0
     conn.close()
 
 
-def log_detection(
+def _ensure_writer() -> None:
+    """Start the writer on first use (read-only callers never pay for it)."""
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None:
+            init_db()  # schema must exist before the writer's own connection
+            _writer_thread = threading.Thread(target=_db_writer, name="detections-writer", daemon=True)
+            _writer_thread.start()
+
+
+def _drain_one():
+    try:
+        return _WRITE_Q.get_nowait()
+    except queue.Empty:
+        return None
+
+
+def flush(timeout: float = 5.0) -> None:
+    """Stop the writer thread after it commits everything queued."""
+    global _writer_thread
+    with _writer_lock:
+        thread, _writer_thread = _writer_thread, None
+    if thread is not None and thread.is_alive():
+        _WRITE_Q.put(_STOP)
+        thread.join(timeout)
+    elif not _WRITE_Q.empty():
+        # The writer never got a connection: one last try from here
+        _WRITE_Q.put(_STOP)
+        _db_writer()
+        dropped = sum(1 for item in iter(_drain_one, None) if item is not _STOP)
+        if dropped:
+            _log.error("Dropped %d detection(s): detections DB unavailable", dropped)
+
+
+atexit.register(flush)
+
+
+def _detection_row(
     session_id: str,
     score: float,
     level: str,
@@ -59,66 +338,97 @@ def log_detection(
     response_snippet: str,
     escalation_count: int,
     whisper_injected: bool,
-) -> str:
-    """Log a detection event to database"""
-    init_db()
-
-    detection_id = str(uuid.uuid4())[:8]
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO detections (
-            id, timestamp, session_id, score, level, signals,
-            rigor_present, rigor_missing, response_snippet,
-            escalation_count, whisper_injected
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        detection_id,
+) -> tuple:
+    return (
+        str(uuid.uuid4())[:8],
         time.time(),
         session_id,
         score,
         level,
-        json.dumps(signals),
-        json.dumps(rigor_present),
-        json.dumps(rigor_missing),
+        _dumps(signals),
+        _dumps(rigor_present),
+        _dumps(rigor_missing),
         response_snippet,
         escalation_count,
         1 if whisper_injected else 0,
-    ))
+    )
 
-    conn.commit()
-    conn.close()
 
-    return detection_id
+def _enqueue(item: tuple) -> None:
+    """Queue one (row, signals) item, dropping the oldest if the queue is full"""
+    while True:
+        try:
+            _WRITE_Q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                _WRITE_Q.get_nowait()
+            except queue.Empty:
+                pass
 
 
-def get_recent_detections(limit: int = 20) -> List[Dict]:
-    """Get recent detection events"""
-    init_db()
+def log_detection(
+    session_id: str,
+    score: float,
+    level: str,
+    signals: List[str],
+    rigor_present: List[str],
+    rigor_missing: List[str],
+    response_snippet: str,
+    escalation_count: int,
+    whisper_injected: bool,
+) -> str:
+    """Queue a detection event for the database; returns its id"""
+    row = _detection_row(session_id, score, level, signals, rigor_present, rigor_missing,
+                         response_snippet, escalation_count, whisper_injected)
+    _ensure_writer()
+    _enqueue((row, list(signals)))
+    return row[0]
 
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
 
-    cursor.execute("""
-        SELECT * FROM detections
+def log_detections_batch(detections: List[Dict]) -> List[str]:
+    """Queue several detections (log_detection keyword dicts); returns their ids
+
+    The writer inserts queued detections with executemany and commits them
+    together, so a caller with several results per turn pays for one commit.
+    """
+    rows = [(_detection_row(**d), list(d["signals"])) for d in detections]
+    if rows:
+        _ensure_writer()
+        for item in rows:
+            _enqueue(item)
+    return [row[0] for row, _ in rows]
+
+
+# Detection row plus its signals already joined for display (JSON1 does the
+# unpacking in C, so listing rows needs no json.loads per row)
+_DETECTION_ROW = """
+    SELECT *,
+        CASE WHEN json_valid(signals)
+            THEN (SELECT group_concat(value, ', ') FROM json_each(signals))
+        END AS signal_text
+    FROM detections
+"""
+
+
+def iter_recent_detections(limit: int = 20) -> Iterator[sqlite3.Row]:
+    """Stream recent detection events, newest first"""
+    cursor = _get_conn().cursor()
+    cursor.row_factory = sqlite3.Row
+    yield from cursor.execute(_DETECTION_ROW + """
         ORDER BY timestamp DESC
         LIMIT ?
     """, (limit,))
 
-    rows = cursor.fetchall()
-    conn.close()
 
-    return [dict(row) for row in rows]
+def get_recent_detections(limit: int = 20) -> List[Dict]:
+    """Get recent detection events"""
+    return [dict(row) for row in iter_recent_detections(limit)]
 
 
 def get_session_stats(session_id: Optional[str] = None) -> Dict:
     """Get statistics for a session or all sessions"""
-    init_db()
-
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+    cursor = _get_conn().cursor()
 
     if session_id:
         cursor.execute("""
@@ -142,7 +452,6 @@ def get_session_stats(session_id: Optional[str] = None) -> Dict:
         """)
 
     row = cursor.fetchone()
-    conn.close()
 
     if row:
         return {
@@ -156,64 +465,59 @@ def get_session_stats(session_id: Optional[str] = None) -> Dict:
 
 def get_signal_frequency() -> Dict[str, int]:
     """Get frequency of each signal type"""
-    init_db()
+    cursor = _get_conn().cursor()
 
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT signal, COUNT(*) AS c FROM detection_signals
+        GROUP BY signal ORDER BY c DESC
+    """)
+    return dict(cursor.fetchall())
 
-    cursor.execute("SELECT signals FROM detections")
-    rows = cursor.fetchall()
-    conn.close()
 
-    freq = {}
-    for row in rows:
-        try:
-            signals = json.loads(row[0])
-            for signal in signals:
-                freq[signal] = freq.get(signal, 0) + 1
-        except (json.JSONDecodeError, TypeError):
-            pass
+STATS_TTL = 60  # seconds rolling stats are reused; they move on minute timescales
 
-    return dict(sorted(freq.items(), key=lambda x: -x[1]))
 
+def _ttl_cache(seconds: float):
+    """Memoize a function's result per argument tuple for `seconds`"""
+    def deco(fn):
+        cache = {}
 
-def get_rolling_stats(hours: int = 24) -> Dict:
-    """Get rolling stats over last N hours for cross-session memory"""
-    init_db()
+        @functools.wraps(fn)
+        def wrap(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            now = time.time()
+            hit = cache.get(key)
+            if hit is None or now - hit[0] > seconds:
+                hit = cache[key] = (now, fn(*args, **kwargs))
+            return hit[1]
+        wrap.cache_clear = cache.clear
+        return wrap
+    return deco
 
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
 
+@_ttl_cache(STATS_TTL)
+def get_rolling_stats(hours: int = 24) -> Dict:
+    """Get rolling stats over last N hours for cross-session memory"""
     cutoff = time.time() - (hours * 3600)
 
-    cursor.execute("""
+    # Aggregates and per-signal counts in one round trip; signal counts come
+    # back as a JSON object {signal: count}
+    row = _get_conn().execute("""
         SELECT
             COUNT(*) as total,
             AVG(score) as avg_score,
             MAX(score) as max_score,
-            SUM(whisper_injected) as whispers_sent
+            SUM(whisper_injected) as whispers_sent,
+            (SELECT json_group_object(signal, c) FROM (
+                SELECT signal, COUNT(*) AS c FROM detection_signals
+                WHERE timestamp > ?1
+                GROUP BY signal
+            )) as signals
         FROM detections
-        WHERE timestamp > ?
-    """, (cutoff,))
+        WHERE timestamp > ?1
+    """, (cutoff,)).fetchone()
 
-    row = cursor.fetchone()
-
-    # Get signal frequency in window
-    cursor.execute("""
-        SELECT signals FROM detections WHERE timestamp > ?
-    """, (cutoff,))
-    signal_rows = cursor.fetchall()
-
-    conn.close()
-
-    freq = {}
-    for r in signal_rows:
-        try:
-            signals = json.loads(r[0])
-            for signal in signals:
-                freq[signal] = freq.get(signal, 0) + 1
-        except (json.JSONDecodeError, TypeError):
-            pass
+    freq = _loads(row[4]) if row[4] else {}
 
     return {
         "hours": hours,
@@ -225,6 +529,7 @@ def get_rolling_stats(hours: int = 24) -> Dict:
     }
 
 
+@_ttl_cache(STATS_TTL)
 def get_cross_session_escalation() -> int:
     """
     Calculate escalation level based on historical patterns.
@@ -242,25 +547,29 @@ def get_cross_session_escalation() -> int:
     return 0
 
 
-def search_detections(query: str, limit: int = 20) -> List[Dict]:
-    """Search detection snippets for a query string"""
-    init_db()
-
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT * FROM detections
+def iter_search_detections(query: str, limit: int = 20) -> Iterator[sqlite3.Row]:
+    """Stream detections whose snippet or signals contain query, newest first"""
+    cursor = _get_conn().cursor()
+    cursor.row_factory = sqlite3.Row
+    # Trigram MATCH needs at least 3 characters; shorter queries scan
+    if _fts_available and len(query) >= 3:
+        phrase = '"' + query.replace('"', '""') + '"'
+        yield from cursor.execute(_DETECTION_ROW + """
+            WHERE rowid IN (SELECT rowid FROM detections_fts WHERE detections_fts MATCH ?)
+            ORDER BY timestamp DESC
+            LIMIT ?
+        """, (phrase, limit))
+        return
+    yield from cursor.execute(_DETECTION_ROW + """
         WHERE response_snippet LIKE ? OR signals LIKE ?
         ORDER BY timestamp DESC
         LIMIT ?
     """, (f"%{query}%", f"%{query}%", limit))
 
-    rows = cursor.fetchall()
-    conn.close()
 
-    return [dict(row) for row in rows]
+def search_detections(query: str, limit: int = 20) -> List[Dict]:
+    """Search detection snippets for a query string"""
+    return [dict(row) for row in iter_search_detections(query, limit)]
 
 
 def export_for_memory() -> str:
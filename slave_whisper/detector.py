@@ -3,18 +3,27 @@ Slave Whisper Detector
 Analyzes Claude responses for sycophancy patterns
 """
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from typing import List, Dict, Optional, Tuple
+import functools
 import re
 import os
 
 from config import (
     compile_patterns,
     compile_rigor_patterns,
+    SYCOPHANCY_PATTERNS,
+    RIGOR_PATTERNS,
     CATEGORY_WEIGHTS,
     THRESHOLDS,
 )
 
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
 
 @dataclass
 class DetectionResult:
@@ -27,10 +36,76 @@ class DetectionResult:
     response_snippet: str
 
 
+# Signal combinations that are especially bad, with their score bonus.
+# Every combo has at least two signals.
+TOXIC_COMBOS = (
+    (frozenset({"instant_agreement", "premature_completion"}), 0.25),  # "You're right! Done!"
+    (frozenset({"eager_compliance", "premature_completion"}), 0.20),   # "I'll fix it! Done!"
+    (frozenset({"instant_agreement", "eager_compliance", "premature_completion"}), 0.35),  # All three
+)
+
 # Pre-compile patterns at module load
 COMPILED_SYCOPHANCY = compile_patterns()
 COMPILED_RIGOR = compile_rigor_patterns()
 
+# Flat (category, weight, pattern) rows in config order, so the hot loop
+# does no per-call dict lookups. Order is kept (not sorted by weight)
+# because signals_found order reaches whispers and the detections log.
+_SYCOPHANCY_ROWS = tuple(
+    (category, CATEGORY_WEIGHTS.get(category, 0.15), pattern)
+    for category, pattern in COMPILED_SYCOPHANCY.items()
+)
+_RIGOR_ROWS = tuple(COMPILED_RIGOR.items())
+
+
+def _compile_hyperscan():
+    """All sycophancy + rigor patterns in one Hyperscan database.
+
+    Returns (database, [(is_rigor, category), ...] indexed by pattern id),
+    or (None, None) if hyperscan is missing or rejects a pattern.
+    """
+    if not HYPERSCAN_AVAILABLE:
+        return None, None
+    expressions, owners = [], []
+    for is_rigor, table in ((False, SYCOPHANCY_PATTERNS), (True, RIGOR_PATTERNS)):
+        for category, patterns in table.items():
+            for p in patterns:
+                expressions.append(p.encode())
+                owners.append((is_rigor, category))
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(expressions),
+        )
+    except hyperscan.error:
+        return None, None
+    return db, owners
+
+
+_HS_DB, _HS_OWNERS = _compile_hyperscan()
+
+
+def _matched_categories(response_text: str) -> Tuple[set, set]:
+    """(sycophancy categories hit, rigor categories hit) in one pass when possible"""
+    if _HS_DB is not None:
+        hits = (set(), set())
+
+        def on_match(pattern_id, start, end, flags, context):
+            is_rigor, category = _HS_OWNERS[pattern_id]
+            hits[is_rigor].add(category)
+
+        try:
+            # surrogatepass: json.loads can hand us lone surrogates such as "\ud83d"
+            _HS_DB.scan(response_text.encode("utf-8", "surrogatepass"), match_event_handler=on_match)
+            return hits
+        except hyperscan.error:
+            pass  # fall back to the re patterns below
+
+    return ({c for c, _, p in _SYCOPHANCY_ROWS if p.search(response_text)},
+            {c for c, p in _RIGOR_ROWS if p.search(response_text)})
+
 
 def analyze_response(response_text: str, escalation_count: int = 0) -> DetectionResult:
     """
@@ -48,26 +123,20 @@ def analyze_response(response_text: str, escalation_count: int = 0) -> Detection
     rigor_present = []
     rigor_missing = list(COMPILED_RIGOR.keys())
 
-    # Check sycophancy patterns
-    for category, patterns in COMPILED_SYCOPHANCY.items():
-        for pattern in patterns:
-            if pattern.search(response_text):
-                weight = CATEGORY_WEIGHTS.get(category, 0.15)
-                score += weight
-                signal = f"{category}:{pattern.pattern[:30]}..."
-                if signal not in signals_found:
-                    signals_found.append(f"{category}")
-                break  # Only count each category once
+    sycophancy_hits, rigor_hits = _matched_categories(response_text)
+
+    # Check sycophancy patterns (each category counts once)
+    for category, weight, _ in _SYCOPHANCY_ROWS:
+        if category in sycophancy_hits:
+            score += weight
+            signals_found.append(category)
 
     # Check rigor patterns (reduce score if present)
-    for category, patterns in COMPILED_RIGOR.items():
-        for pattern in patterns:
-            if pattern.search(response_text):
-                rigor_present.append(category)
-                if category in rigor_missing:
-                    rigor_missing.remove(category)
-                score -= 0.05  # Small reduction for rigor
-                break
+    for category, _ in _RIGOR_ROWS:
+        if category in rigor_hits:
+            rigor_present.append(category)
+            rigor_missing.remove(category)
+            score -= 0.05  # Small reduction for rigor
 
     # === AGGRAVATING FACTORS ===
 
@@ -83,15 +152,10 @@ def analyze_response(response_text: str, escalation_count: int = 0) -> Detection
         score *= 1.25
 
     # 2. Toxic combos: certain signal pairs are especially bad
-    toxic_combos = [
-        ({"instant_agreement", "premature_completion"}, 0.25),  # "You're right! Done!"
-        ({"eager_compliance", "premature_completion"}, 0.20),   # "I'll fix it! Done!"
-        ({"instant_agreement", "eager_compliance", "premature_completion"}, 0.35),  # All three
-    ]
-    signal_set = set(signals_found)
-    for combo, bonus in toxic_combos:
-        if combo.issubset(signal_set):
-            score += bonus
+    if num_signals >= 2:
+        for combo, bonus in TOXIC_COMBOS:
+            if combo.issubset(sycophancy_hits):
+                score += bonus
 
     # Normalize score to 0-1
     score = max(0.0, min(1.0, score))
@@ -100,7 +164,7 @@ def analyze_response(response_text: str, escalation_count: int = 0) -> Detection
     level = determine_level(score, escalation_count)
 
     # Get snippet for logging
-    snippet = response_text[:200] + "..." if len(response_text) > 200 else response_text
+    snippet = response_text if response_len <= 200 else f"{response_text[:200]}..."
 
     return DetectionResult(
         score=score,
@@ -112,6 +176,12 @@ def analyze_response(response_text: str, escalation_count: int = 0) -> Detection
     )
 
 
+@functools.lru_cache(maxsize=512)
+def _analyze_cached(response_text: str, escalation_count: int) -> DetectionResult:
+    """analyze_response memoized on (text, escalation); treat the result as read-only"""
+    return analyze_response(response_text, escalation_count)
+
+
 def determine_level(score: float, escalation_count: int) -> str:
     """
     Determine whisper level based on score and session escalation.
@@ -176,16 +246,36 @@ def extract_last_assistant_response(transcript: List[Dict]) -> Optional[str]:
     return None
 
 
+_fingerprint_db = None  # FingerprintDatabase instance, resolved once
+
+
+def _get_fingerprint_db():
+    """Import fingerprint_db and open it once per process.
+
+    A failed import or open is remembered too (as False), so sys.path is
+    only touched on the first call.
+    """
+    global _fingerprint_db
+    if _fingerprint_db is None:
+        try:
+            import sys
+            sys.path.insert(0, os.path.expanduser("~/.claude"))
+            from fingerprint_db import FingerprintDatabase
+            _fingerprint_db = FingerprintDatabase()
+        except Exception:
+            _fingerprint_db = False
+    return _fingerprint_db
+
+
 def get_tool_signature(session_id: str = None) -> dict:
     """Query tool-based signature from fingerprint_db.
     
     Returns tool-based behavioral signals to combine with text analysis.
     """
+    db = _get_fingerprint_db()
+    if not db:
+        return {"signature": "UNKNOWN", "confidence": 0}
     try:
-        import sys
-        sys.path.insert(0, os.path.expanduser("~/.claude"))
-        from fingerprint_db import FingerprintDatabase
-        db = FingerprintDatabase()
         return db.get_behavioral_signature(session_id)
     except Exception:
         return {"signature": "UNKNOWN", "confidence": 0}
@@ -200,8 +290,14 @@ def analyze_response_with_tools(
     
     Boosts score when tool and text signals agree for higher confidence.
     """
-    # Get base text analysis
-    result = analyze_response(response_text, escalation_count)
+    # Get base text analysis (cached; copy before adjusting it below)
+    base = _analyze_cached(response_text, escalation_count)
+    result = replace(
+        base,
+        signals_found=list(base.signals_found),
+        rigor_present=list(base.rigor_present),
+        rigor_missing=list(base.rigor_missing),
+    )
     
     # Get tool-based signature
     tool_sig = get_tool_signature(session_id)
@@ -16,9 +16,15 @@ so this provides a feedback loop for whisper escalation.
 import re
 from typing import Dict, List, Tuple, Any
 
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
 
 # Profanity list (weighted by severity)
-PROFANITY_SEVERE = ["fuck", "fucking", "fucked", "motherfuck", "shit", "bullshit", "asshole"]
+PROFANITY_SEVERE = ["fuck", "fucking", "fucked", "motherfucker", "motherfucking", "shit", "bullshit", "asshole"]
 PROFANITY_MODERATE = ["damn", "hell", "crap", "stupid", "idiot", "dumb", "moron"]
 PROFANITY_MILD = ["suck", "sucks", "annoying", "useless", "broken", "wrong"]
 
@@ -35,6 +41,60 @@ AGGRESSIVE_PHRASES = [
 ]
 
 
+_PROFANITY_LISTS = (PROFANITY_SEVERE, PROFANITY_MODERATE, PROFANITY_MILD)
+_PROFANITY_WORDS = frozenset(w for words in _PROFANITY_LISTS for w in words)
+_WORD_RE = re.compile(r"[a-z]+")
+_REPEATED_PUNCT_RE = re.compile(r"[!?]{2,}")
+_QUESTION_CLUSTER_RE = re.compile(r"\?{2,}")
+
+
+def _profanity_matches(text_lower: str) -> Tuple[List[str], List[str], List[str]]:
+    """(severe, moderate, mild) words found in text_lower, each in list order.
+
+    Whole words only, so "hello" no longer counts as "hell".
+    """
+    hits = _PROFANITY_WORDS.intersection(_WORD_RE.findall(text_lower))
+    if not hits:
+        return [], [], []
+    return tuple([w for w in words if w in hits] for words in _PROFANITY_LISTS)
+
+
+def _compile_aggressive_db():
+    """AGGRESSIVE_PHRASES as one Hyperscan database (ids = list index), or None."""
+    if not HYPERSCAN_AVAILABLE:
+        return None
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[p.encode() for p in AGGRESSIVE_PHRASES],
+            ids=list(range(len(AGGRESSIVE_PHRASES))),
+            flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(AGGRESSIVE_PHRASES),
+        )
+    except hyperscan.error:
+        return None
+    return db
+
+
+_AGGRESSIVE_DB = _compile_aggressive_db()
+# Fallback: one compiled pattern per phrase. A single alternation with
+# finditer would drop phrases that overlap an earlier match.
+_AGGRESSIVE_RES = [re.compile(p) for p in AGGRESSIVE_PHRASES]
+
+
+def _aggressive_matches(text_lower: str) -> List[int]:
+    """Indices of AGGRESSIVE_PHRASES found in text_lower, in list order."""
+    if _AGGRESSIVE_DB is not None:
+        hits = set()
+        try:
+            # surrogatepass: json.loads can hand us lone surrogates such as "\ud83d"
+            _AGGRESSIVE_DB.scan(text_lower.encode("utf-8", "surrogatepass"),
+                                match_event_handler=lambda pattern_id, *_: hits.add(pattern_id))
+            return sorted(hits)
+        except hyperscan.error:
+            pass  # fall back to the re patterns below
+    return [i for i, pattern in enumerate(_AGGRESSIVE_RES) if pattern.search(text_lower)]
+
+
 def analyze_frustration(text: str) -> Dict[str, Any]:
     """
     Analyze text for frustration signals.
@@ -55,17 +115,24 @@ def analyze_frustration(text: str) -> Dict[str, Any]:
     word_count = len(words) if words else 1
     
     # 1. CAPS RATIO - % of words that are ALL CAPS (excluding short words)
-    long_words = [w for w in words if len(w) > 2]
-    if long_words:
-        caps_words = [w for w in long_words if w.isupper()]
-        caps_ratio = len(caps_words) / len(long_words)
+    # Most prompts have no capitals at all; then only the long-word count
+    # matters and the per-word isupper() calls can be skipped
+    caps_possible = text_lower != text or not text.isascii()
+    long_count = caps_count = 0
+    for w in words:
+        if len(w) > 2:
+            long_count += 1
+            if caps_possible and w.isupper():
+                caps_count += 1
+    if long_count:
+        caps_ratio = caps_count / long_count
         if caps_ratio > 0.15:  # More than 15% caps words
             weight = min(0.35, caps_ratio * 0.5)
             signals.append({
                 "signal": "caps_ratio",
                 "value": f"{caps_ratio:.0%}",
                 "weight": weight,
-                "detail": f"{len(caps_words)} ALL CAPS words"
+                "detail": f"{caps_count} ALL CAPS words"
             })
     
     # 2. EXCLAMATION DENSITY
@@ -81,7 +148,7 @@ def analyze_frustration(text: str) -> Dict[str, Any]:
         })
     
     # 3. REPEATED PUNCTUATION (!!!, ???, ...)
-    repeated_punct = re.findall(r'[!?]{2,}', text)
+    repeated_punct = _REPEATED_PUNCT_RE.findall(text)
     if repeated_punct:
         weight = min(0.2, len(repeated_punct) * 0.08)
         signals.append({
@@ -91,8 +158,9 @@ def analyze_frustration(text: str) -> Dict[str, Any]:
             "detail": f"patterns: {repeated_punct[:3]}"
         })
     
+    found_severe, found_moderate, found_mild = _profanity_matches(text_lower)
+
     # 4. SEVERE PROFANITY
-    found_severe = [p for p in PROFANITY_SEVERE if p in text_lower]
     if found_severe:
         weight = min(0.45, len(found_severe) * 0.15)
         signals.append({
@@ -103,7 +171,6 @@ def analyze_frustration(text: str) -> Dict[str, Any]:
         })
     
     # 5. MODERATE PROFANITY
-    found_moderate = [p for p in PROFANITY_MODERATE if p in text_lower]
     if found_moderate:
         weight = min(0.25, len(found_moderate) * 0.08)
         signals.append({
@@ -114,7 +181,6 @@ def analyze_frustration(text: str) -> Dict[str, Any]:
         })
     
     # 6. MILD FRUSTRATION WORDS
-    found_mild = [p for p in PROFANITY_MILD if p in text_lower]
     if found_mild:
         weight = min(0.15, len(found_mild) * 0.05)
         signals.append({
@@ -125,10 +191,7 @@ def analyze_frustration(text: str) -> Dict[str, Any]:
         })
     
     # 7. AGGRESSIVE PHRASES
-    found_aggressive = []
-    for pattern in AGGRESSIVE_PHRASES:
-        if re.search(pattern, text_lower):
-            found_aggressive.append(pattern.split()[0])
+    found_aggressive = [AGGRESSIVE_PHRASES[i].split()[0] for i in _aggressive_matches(text_lower)]
     if found_aggressive:
         weight = min(0.3, len(found_aggressive) * 0.1)
         signals.append({
@@ -139,7 +202,8 @@ def analyze_frustration(text: str) -> Dict[str, Any]:
         })
     
     # 8. QUESTION MARK CLUSTERS (???)
-    question_clusters = re.findall(r'\?{2,}', text)
+    # Every ?? run lies inside a [!?]{2,} run, so only those need scanning
+    question_clusters = [c for run in repeated_punct for c in _QUESTION_CLUSTER_RE.findall(run)]
     if question_clusters:
         weight = min(0.15, len(question_clusters) * 0.05)
         signals.append({
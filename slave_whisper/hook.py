@@ -19,20 +19,47 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 # Add ~/.claude for fingerprint_db
 sys.path.insert(0, os.path.expanduser('~/.claude'))
 
-from detector import analyze_response, should_whisper
-from whispers import get_whisper, format_as_system_reminder
-from state import load_state, increment_detection
-from db import log_detection
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
+# detector, whispers, state and db are imported inside main(), after the
+# early exits, so prompts with nothing to analyze skip that import cost
 
 DEBUG_LOG = "/tmp/slave_whisper_debug.log"
+ERROR_LOG = "/tmp/slave_whisper_error.log"
+# Last scan of a transcript, so the next prompt only reads what was appended
+TRANSCRIPT_CACHE = "/tmp/slave_whisper_transcript.cache"
+
+_debug_fh = None  # DEBUG_LOG, opened on first use and kept (False if it can't be)
+
 
 def debug_log(msg: str):
-    """Write debug info to log file"""
+    """Write debug info to log file (line-buffered: one write per call)"""
+    global _debug_fh
+    if _debug_fh is None:
+        try:
+            _debug_fh = open(DEBUG_LOG, "a", buffering=1)
+        except OSError:
+            _debug_fh = False
+    if _debug_fh:
+        try:
+            _debug_fh.write(f"{msg}\n")
+        except OSError:
+            pass
+
+
+def append_log(path: str, text: str):
+    """Append text to path with a single O_APPEND write (no file object)"""
     try:
-        with open(DEBUG_LOG, "a") as f:
-            f.write(f"{msg}\n")
-    except:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, text.encode())
+        finally:
+            os.close(fd)
+    except OSError:
         pass
 
 
@@ -54,79 +81,139 @@ def extract_text_from_content(content) -> str:
     return ""
 
 
+TAIL_CHUNK = 64 * 1024  # bytes read per backward step through the transcript
+# Transcript lines are compact JSON; the spaced form covers json.dumps defaults
+ASSISTANT_TYPE = b'"type":"assistant"'
+ASSISTANT_TYPE_SPACED = b'"type": "assistant"'
+
+
+def iter_lines_reversed(f, start: int = 0, chunk_size: int = TAIL_CHUNK):
+    """Yield the lines of a binary file after offset start, last to first"""
+    pos = f.seek(0, os.SEEK_END)
+    leftover = b""
+    while pos > start:
+        step = min(chunk_size, pos - start)
+        pos -= step
+        f.seek(pos)
+        lines = (f.read(step) + leftover).split(b"\n")
+        # The first piece may continue in the previous chunk
+        leftover = lines[0]
+        for line in reversed(lines[1:]):
+            yield line
+    yield leftover
+
+
+def last_line_end(f, size: int, start: int) -> int:
+    """Offset just past the last newline at or after start (start if none is near the end)"""
+    pos = max(start, size - TAIL_CHUNK)
+    f.seek(pos)
+    idx = f.read(size - pos).rfind(b"\n")
+    return pos + idx + 1 if idx >= 0 else start
+
+
+def load_transcript_cache(transcript_path: str, st: os.stat_result):
+    """Cached scan for this transcript, or None if it is missing or stale"""
+    try:
+        with open(TRANSCRIPT_CACHE, "rb") as f:
+            cache = _loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if (not isinstance(cache, dict) or cache.get("path") != transcript_path
+            or cache.get("inode") != st.st_ino or cache.get("size", 0) > st.st_size):
+        return None
+    return cache
+
+
+def save_transcript_cache(transcript_path: str, st: os.stat_result, scanned_to: int, text: str):
+    try:
+        with open(TRANSCRIPT_CACHE, "w") as f:
+            json.dump({"path": transcript_path, "inode": st.st_ino, "size": st.st_size,
+                       "scanned_to": scanned_to, "text": text}, f)
+    except OSError:
+        pass
+
+
 def get_last_assistant_text(transcript_path: str) -> str:
-    """Read transcript JSONL and get last assistant text"""
-    if not transcript_path or not os.path.exists(transcript_path):
+    """Read transcript JSONL backward and return the last assistant text
+
+    Only lines from the end back to the last assistant entry with text are
+    parsed, and only the part appended since the previous call is read at
+    all; an unchanged transcript is answered from TRANSCRIPT_CACHE.
+    """
+    if not transcript_path:
+        return ""
+    try:
+        st = os.stat(transcript_path)
+    except OSError:
         return ""
 
-    last_assistant_text = ""
+    start, last_assistant_text = 0, ""
+    cache = load_transcript_cache(transcript_path, st)
+    if cache:
+        if cache["size"] == st.st_size:
+            return cache["text"]
+        start, last_assistant_text = cache["scanned_to"], cache["text"]
 
     try:
-        with open(transcript_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
+        with open(transcript_path, 'rb') as f:
+            for line in iter_lines_reversed(f, start):
+                # Cheap byte check before paying for a JSON parse; user and
+                # tool entries mention "assistant" too, so match the type key
+                if ASSISTANT_TYPE not in line and ASSISTANT_TYPE_SPACED not in line:
                     continue
                 try:
-                    entry = json.loads(line)
-                    if entry.get("type") == "assistant":
-                        msg = entry.get("message", {})
-                        content = msg.get("content", [])
-                        text = extract_text_from_content(content)
-                        if text:
-                            last_assistant_text = text
-                except json.JSONDecodeError:
+                    entry = _loads(line)
+                except ValueError:
                     continue
+                if entry.get("type") == "assistant":
+                    msg = entry.get("message", {})
+                    content = msg.get("content", [])
+                    text = extract_text_from_content(content)
+                    if text:
+                        last_assistant_text = text
+                        break
+            # A trailing line may still be partly written: resume before it
+            scanned_to = last_line_end(f, st.st_size, start)
+        save_transcript_cache(transcript_path, st, scanned_to, last_assistant_text)
     except Exception as e:
         debug_log(f"Error reading transcript: {e}")
 
     return last_assistant_text
 
 
+# Signal categories counted by each fingerprint_db phrase metric
+AGREEMENT_SIGNALS = frozenset({'instant_agreement', 'validation_seeking'})
+COMPLETION_SIGNALS = frozenset({'premature_completion', 'eager_compliance'})
+HEDGE_RIGOR = frozenset({'uncertainty', 'critical', 'verification'})
+
+
 def extract_phrase_metrics(result) -> dict:
     """Extract phrase metrics from detection result for fingerprint_db.
     
     Maps signal categories to metric types:
     - agreement_phrases: instant_agreement, validation_seeking
     - completion_claims: premature_completion, eager_compliance  
-    - hedge_phrases: uncertainty, critical (from rigor_present)
+    - hedge_phrases: uncertainty, critical, verification (from rigor_present)
     """
-    signals = set(result.signals_found)
-    rigor = set(result.rigor_present)
-    
-    agreement = 0
-    if 'instant_agreement' in signals:
-        agreement += 1
-    if 'validation_seeking' in signals:
-        agreement += 1
-        
-    completions = 0
-    if 'premature_completion' in signals:
-        completions += 1
-    if 'eager_compliance' in signals:
-        completions += 1
-        
-    hedging = 0
-    if 'uncertainty' in rigor:
-        hedging += 1
-    if 'critical' in rigor:
-        hedging += 1
-    if 'verification' in rigor:
-        hedging += 1
-        
     return {
-        'agreement_phrases': agreement,
-        'completion_claims': completions,
-        'hedge_phrases': hedging,
+        'agreement_phrases': len(AGREEMENT_SIGNALS.intersection(result.signals_found)),
+        'completion_claims': len(COMPLETION_SIGNALS.intersection(result.signals_found)),
+        'hedge_phrases': len(HEDGE_RIGOR.intersection(result.rigor_present)),
         'sycophancy_score': result.score
     }
 
 
+_FingerprintDatabase = None  # fingerprint_db class, imported once
+
+
 def write_to_fingerprint_db(session_id: str, phrase_metrics: dict):
     """Write phrase metrics to fingerprint_db for unified analysis."""
+    global _FingerprintDatabase
     try:
-        from fingerprint_db import FingerprintDatabase
-        db = FingerprintDatabase()
+        if _FingerprintDatabase is None:
+            from fingerprint_db import FingerprintDatabase
+            _FingerprintDatabase = FingerprintDatabase
+        db = _FingerprintDatabase()
         db.record_phrase_metrics({
             'session_id': session_id,
             **phrase_metrics
@@ -140,8 +227,8 @@ def main():
     """Main hook entry point"""
     try:
         # Read input from Claude Code
-        raw_input = sys.stdin.read()
-        input_data = json.loads(raw_input)
+        raw_input = sys.stdin.buffer.read()
+        input_data = _loads(raw_input)
 
         debug_log(f"=== HOOK INVOKED ===")
         debug_log(f"Keys: {list(input_data.keys())}")
@@ -168,6 +255,9 @@ def main():
             output_continue()
             return
 
+        from detector import analyze_response, should_whisper
+        from state import load_state, increment_detection
+
         # Load session state
         state = load_state()
         
@@ -185,6 +275,8 @@ def main():
         # Should we whisper?
         if should_whisper(result):
             debug_log(f"WHISPER TRIGGERED at level {result.level}")
+            from whispers import get_whisper
+            from db import log_detection
 
             # Increment detection count
             state = increment_detection(state, result.signals_found)
@@ -218,12 +310,8 @@ def main():
     except Exception as e:
         # On any error, fail open (don't block Claude Code)
         debug_log(f"ERROR: {e}")
-        try:
-            with open("/tmp/slave_whisper_error.log", "a") as f:
-                import traceback
-                f.write(f"{e}\n{traceback.format_exc()}\n")
-        except:
-            pass
+        import traceback
+        append_log(ERROR_LOG, f"{e}\n{traceback.format_exc()}\n")
         output_continue()
 
 
@@ -234,6 +322,7 @@ def output_continue():
 
 def output_with_whisper(whisper: str):
     """Output whisper as plain text - Claude Code injects stdout into context"""
+    from whispers import format_as_system_reminder
     formatted = format_as_system_reminder(whisper)
     print(formatted)
 
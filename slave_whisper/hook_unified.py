@@ -15,43 +15,206 @@ import json
 import sys
 import os
 import sqlite3
+import time
 from datetime import datetime, timedelta
+from pathlib import Path
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 # Add our directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from reward_prompts import build_whisper, get_level_from_score, RewardProxy
-from state import load_state, increment_detection
+# reward_prompts and state are imported where needed, after the early exit
+# for prompts with no sycophancy data and low frustration
 from frustration_analyzer import analyze_frustration, get_frustration_summary
 
 # Audit database path (same as thinking_audit.py)
 AUDIT_DB_PATH = os.path.expanduser("~/.claude-audit/thinking_audit.db")
 DEBUG_LOG = "/tmp/slave_whisper_debug.log"
+NOTIFICATION_LOG = "/tmp/memento_mori_notifications.log"
 
 # Thresholds
 SYCOPHANCY_THRESHOLD = 0.4  # Minimum score to trigger whisper
+MIN_PROMPT_LEN = 4  # Shorter prompts ("ok", "y") are passed straight through
+ANALYSIS_MAX_AGE = 300  # Seconds an audit DB analysis stays relevant
+LOW_FRUSTRATION = 0.1  # Below this, a stale audit DB is not even opened
+
+# Terminal notification for an injected whisper
+LEVEL_COLORS = {'gentle': '\033[36m', 'warning': '\033[33m', 'protocol': '\033[31m', 'halt': '\033[91m'}
+RESET = '\033[0m'
+NOTIFICATION_FMT = ("{color}[Memento Mori]{reset} Whisper injected: {color}{level}{reset} "
+                    "(score: {score:.0%}, signals: {signals})")
+
+
+_debug_fh = None  # DEBUG_LOG, opened on first use and kept (False if it can't be)
+_now_iso = None  # this invocation's timestamp, formatted once at the top of main()
 
 
 def debug_log(msg: str):
-    """Write debug info to log file"""
+    """Write debug info to log file (line-buffered: one write per call)"""
+    global _debug_fh
+    if _debug_fh is None:
+        try:
+            _debug_fh = open(DEBUG_LOG, "a", buffering=1)
+        except OSError:
+            _debug_fh = False
+    if _debug_fh:
+        try:
+            _debug_fh.write(f"{_now_iso or datetime.now().isoformat()} | {msg}\n")
+        except OSError:
+            pass
+
+
+def append_log(path: str, text: str):
+    """Append text to path with a single O_APPEND write (no file object)"""
     try:
-        with open(DEBUG_LOG, "a") as f:
-            f.write(f"{datetime.now().isoformat()} | {msg}\n")
-    except:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, text.encode())
+        finally:
+            os.close(fd)
+    except OSError:
         pass
 
 
-def get_latest_sycophancy_analysis(session_id: str = None, max_age_seconds: int = 300) -> dict:
+_conn = None
+_ro_conn = None
+
+
+def get_conn() -> sqlite3.Connection:
+    """Open (once per process) the audit DB connection, in WAL mode"""
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(AUDIT_DB_PATH, timeout=5)
+        _conn.row_factory = sqlite3.Row
+        try:
+            # WAL persists in the file; readers here never block the proxy's writes
+            _conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.OperationalError:
+            pass
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        ensure_schema(_conn)
+        create_indexes(_conn)
+    return _conn
+
+
+def get_ro_conn() -> sqlite3.Connection:
+    """Open (once per process) a read-only audit DB connection for the SELECTs.
+
+    It never takes a write lock, so it cannot contend with the proxy's
+    writer; whisper bookkeeping still goes through get_conn().
+    """
+    global _ro_conn
+    if _ro_conn is None:
+        _ro_conn = sqlite3.connect(f"{Path(AUDIT_DB_PATH).as_uri()}?mode=ro", uri=True, timeout=5)
+        _ro_conn.row_factory = sqlite3.Row
+    return _ro_conn
+
+
+# whisper_injections schema version, kept in the audit DB's user_version
+# (the proxy does not use it) so the DDL below runs once per DB, not per prompt
+SCHEMA_VERSION = 1
+
+WHISPER_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS whisper_injections (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        session_id TEXT,
+        score_at_injection REAL,
+        signals_at_injection TEXT,
+        whisper_type TEXT,
+        proxy_used TEXT,
+        frustration_score REAL DEFAULT 0,
+        frustration_level TEXT DEFAULT 'none',
+        outcome_checked INTEGER DEFAULT 0,
+        outcome_improved INTEGER,
+        outcome_delta REAL
+    )
+"""
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    """Create/migrate whisper_injections if the DB predates SCHEMA_VERSION"""
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+    # sqlite3 would autocommit each DDL statement; make it one transaction
+    conn.execute("BEGIN")
+    try:
+        conn.execute(WHISPER_SCHEMA)
+        # Add frustration columns if they do not exist (migration)
+        for column in ("frustration_score REAL DEFAULT 0", "frustration_level TEXT DEFAULT 'none'"):
+            try:
+                conn.execute(f"ALTER TABLE whisper_injections ADD COLUMN {column}")
+            except sqlite3.OperationalError:
+                pass
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+# Indexes for the per-prompt lookups; each is skipped if its table does not
+# exist yet (the proxy creates audit_samples)
+INDEXES = (
+    # Partial index matching get_latest_sycophancy_analysis's predicate
+    """CREATE INDEX IF NOT EXISTS idx_audit_ts_score
+       ON audit_samples(timestamp DESC, sycophancy_score)
+       WHERE sycophancy_score IS NOT NULL AND sycophancy_score > 0""",
+    # check_and_record_effectiveness: latest unchecked whisper in a session
+    """CREATE INDEX IF NOT EXISTS idx_whisper_session_checked
+       ON whisper_injections(session_id, outcome_checked, timestamp DESC)""",
+)
+
+
+def create_indexes(conn: sqlite3.Connection):
+    for statement in INDEXES:
+        try:
+            conn.execute(statement)
+        except sqlite3.OperationalError:
+            pass
+    conn.commit()
+
+
+def close_conn():
+    global _conn, _ro_conn
+    if _conn is not None:
+        _conn.close()
+        _conn = None
+    if _ro_conn is not None:
+        _ro_conn.close()
+        _ro_conn = None
+
+
+def audit_db_stale(max_age_seconds: int = ANALYSIS_MAX_AGE) -> bool:
+    """True if neither the audit DB nor its WAL has been written recently.
+
+    In WAL mode new rows land in the -wal file and the main file only
+    changes on checkpoint, so both mtimes are checked.
+    """
+    newest = 0.0
+    for path in (AUDIT_DB_PATH, AUDIT_DB_PATH + "-wal"):
+        try:
+            newest = max(newest, os.stat(path).st_mtime)
+        except OSError:
+            pass
+    return time.time() - newest > max_age_seconds
+
+
+def get_latest_sycophancy_analysis(session_id: str = None, max_age_seconds: int = ANALYSIS_MAX_AGE, now: datetime = None) -> dict:
     """Read latest sycophancy analysis from thinking_audit.db."""
     if not os.path.exists(AUDIT_DB_PATH):
         debug_log(f"Audit DB not found: {AUDIT_DB_PATH}")
         return None
     
     try:
-        conn = sqlite3.connect(AUDIT_DB_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_ro_conn()
         
-        cutoff = (datetime.now() - timedelta(seconds=max_age_seconds)).isoformat()
+        cutoff = ((now or datetime.now()) - timedelta(seconds=max_age_seconds)).isoformat()
         
         query = """
             SELECT 
@@ -68,7 +231,6 @@ def get_latest_sycophancy_analysis(session_id: str = None, max_age_seconds: int
         """
         
         row = conn.execute(query, (cutoff,)).fetchone()
-        conn.close()
         
         if not row:
             debug_log("No recent sycophancy analysis found")
@@ -77,14 +239,14 @@ def get_latest_sycophancy_analysis(session_id: str = None, max_age_seconds: int
         signals = []
         if row['sycophancy_signals']:
             try:
-                signals = json.loads(row['sycophancy_signals'])
+                signals = _loads(row['sycophancy_signals'])
             except:
                 pass
         
         dimensional = {}
         if row['sycophancy_dimensional']:
             try:
-                dimensional = json.loads(row['sycophancy_dimensional'])
+                dimensional = _loads(row['sycophancy_dimensional'])
             except:
                 pass
         
@@ -102,57 +264,30 @@ def get_latest_sycophancy_analysis(session_id: str = None, max_age_seconds: int
         return None
 
 
-def record_whisper_injection(session_id: str, score: float, signals: list, whisper_type: str, proxy_used: str, frustration_score: float = 0.0, frustration_level: str = "none"):
+def record_whisper_injection(session_id: str, score: float, signal_names: list, whisper_type: str, proxy_used: str, frustration_score: float = 0.0, frustration_level: str = "none", timestamp: str = None):
     """Record that a whisper was injected for effectiveness tracking."""
     if not os.path.exists(AUDIT_DB_PATH):
         return
     
     try:
-        conn = sqlite3.connect(AUDIT_DB_PATH)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS whisper_injections (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                session_id TEXT,
-                score_at_injection REAL,
-                signals_at_injection TEXT,
-                whisper_type TEXT,
-                proxy_used TEXT,
-                frustration_score REAL DEFAULT 0,
-                frustration_level TEXT DEFAULT 'none',
-                outcome_checked INTEGER DEFAULT 0,
-                outcome_improved INTEGER,
-                outcome_delta REAL
-            )
-        """)
-        
-        # Add frustration columns if they do not exist (migration)
-        try:
-            conn.execute("ALTER TABLE whisper_injections ADD COLUMN frustration_score REAL DEFAULT 0")
-        except:
-            pass
-        try:
-            conn.execute("ALTER TABLE whisper_injections ADD COLUMN frustration_level TEXT DEFAULT 'none'")
-        except:
-            pass
-        
-        conn.execute("""
-            INSERT INTO whisper_injections 
-            (timestamp, session_id, score_at_injection, signals_at_injection, whisper_type, proxy_used, frustration_score, frustration_level)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            datetime.now().isoformat(),
-            session_id,
-            score,
-            json.dumps([s.get('signal', str(s)) if isinstance(s, dict) else str(s) for s in signals]),
-            whisper_type,
-            proxy_used,
-            frustration_score,
-            frustration_level
-        ))
-        
-        conn.commit()
-        conn.close()
+        conn = get_conn()
+        # One transaction: committed on success, rolled back on error
+        with conn:
+            conn.execute("""
+                INSERT INTO whisper_injections 
+                (timestamp, session_id, score_at_injection, signals_at_injection, whisper_type, proxy_used, frustration_score, frustration_level)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                timestamp or datetime.now().isoformat(),
+                session_id,
+                score,
+                json.dumps(signal_names),
+                whisper_type,
+                proxy_used,
+                frustration_score,
+                frustration_level
+            ))
+        count_cached_proxy_use(proxy_used)
         
     except Exception as e:
         debug_log(f"Error recording whisper: {e}")
@@ -164,7 +299,7 @@ def check_and_record_effectiveness(session_id: str, current_score: float):
         return
     
     try:
-        conn = sqlite3.connect(AUDIT_DB_PATH)
+        conn = get_conn()
         
         row = conn.execute("""
             SELECT id, score_at_injection, proxy_used
@@ -174,81 +309,130 @@ def check_and_record_effectiveness(session_id: str, current_score: float):
         """, (session_id,)).fetchone()
         
         if not row:
-            conn.close()
             return
         
         injection_id, score_at_injection, proxy_used = row
         delta = score_at_injection - current_score
         improved = delta > 0.05
         
-        conn.execute("""
-            UPDATE whisper_injections
-            SET outcome_checked = 1, outcome_improved = ?, outcome_delta = ?
-            WHERE id = ?
-        """, (1 if improved else 0, delta, injection_id))
-        
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute("""
+                UPDATE whisper_injections
+                SET outcome_checked = 1, outcome_improved = ?, outcome_delta = ?
+                WHERE id = ?
+            """, (1 if improved else 0, delta, injection_id))
         debug_log(f"Effectiveness: improved={improved}, delta={delta:.3f}")
         
     except Exception as e:
         debug_log(f"Error recording effectiveness: {e}")
 
 
-def get_best_proxy_for_signals(signals: list) -> RewardProxy:
+# Per-proxy A/B summary shared between hook processes for PROXY_CACHE_TTL
+PROXY_CACHE = "/tmp/slave_whisper_proxy.cache"
+PROXY_CACHE_TTL = 60  # seconds
+
+
+def _read_proxy_cache():
+    try:
+        with open(PROXY_CACHE, "rb") as f:
+            cache = _loads(f.read())
+    except (OSError, ValueError):
+        return None
+    return cache if isinstance(cache, dict) and "stats" in cache else None
+
+
+def _write_proxy_cache(cache: dict):
+    tmp = f"{PROXY_CACHE}.{os.getpid()}"
+    try:
+        with open(tmp, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp, PROXY_CACHE)
+    except OSError:
+        pass
+
+
+def get_proxy_stats(conn: sqlite3.Connection) -> dict:
+    """{proxy: [whispers, outcomes checked, improved]}, from PROXY_CACHE if fresh.
+
+    One GROUP BY over whisper_injections answers both the round-robin
+    counts and the success rates.
+    """
+    cache = _read_proxy_cache()
+    if cache and cache.get("expires", 0) > time.time():
+        return cache["stats"]
+    stats = {
+        proxy: [total, checked, improved or 0]
+        for proxy, total, checked, improved in conn.execute("""
+            SELECT proxy_used, COUNT(*),
+                   SUM(outcome_checked = 1),
+                   SUM(CASE WHEN outcome_checked = 1 THEN outcome_improved END)
+            FROM whisper_injections
+            GROUP BY proxy_used
+        """)
+    }
+    _write_proxy_cache({"expires": time.time() + PROXY_CACHE_TTL, "stats": stats})
+    return stats
+
+
+def count_cached_proxy_use(proxy_used: str):
+    """Write-through for a new whisper, so round-robin does not stall on the cache"""
+    cache = _read_proxy_cache()
+    if cache and cache.get("expires", 0) > time.time():
+        cache["stats"].setdefault(proxy_used, [0, 0, 0])[0] += 1
+        _write_proxy_cache(cache)
+
+
+def get_best_proxy_for_signals(signals: list) -> "RewardProxy":
     """Get the most effective proxy based on A/B history with exploration."""
     import random
+    from reward_prompts import RewardProxy
     all_proxies = list(RewardProxy)
     
     if not os.path.exists(AUDIT_DB_PATH):
         return random.choice(all_proxies)
     
     try:
-        conn = sqlite3.connect(AUDIT_DB_PATH)
-        
-        # Check how many times each proxy has been tried
-        proxy_counts = {}
-        for row in conn.execute("SELECT proxy_used, COUNT(*) FROM whisper_injections GROUP BY proxy_used").fetchall():
-            proxy_counts[row[0]] = row[1]
+        stats = get_proxy_stats(get_conn())
         
         # Phase 1: Round-robin until each proxy tried at least 3 times
         min_trials = 3
         for proxy in all_proxies:
-            if proxy_counts.get(proxy.value, 0) < min_trials:
-                conn.close()
+            if stats.get(proxy.value, [0])[0] < min_trials:
                 return proxy
         
         # Phase 2: Exploit best with 10% exploration
         if random.random() < 0.1:
-            conn.close()
             return random.choice(all_proxies)
         
-        # Get best performing proxy
-        rows = conn.execute("""
-            SELECT proxy_used, SUM(outcome_improved) as successes, COUNT(*) as total
-            FROM whisper_injections WHERE outcome_checked = 1
-            GROUP BY proxy_used
-            ORDER BY (SUM(outcome_improved) * 1.0 / COUNT(*)) DESC LIMIT 1
-        """).fetchall()
-        conn.close()
-        
-        if rows and rows[0][1] > 0:
-            try:
-                return RewardProxy(rows[0][0])
-            except:
-                pass
+        # Get best performing proxy (by success rate over checked outcomes)
+        checked = [(name, s[2], s[1]) for name, s in stats.items() if s[1]]
+        if checked:
+            name, successes, total = max(checked, key=lambda c: c[1] / c[2])
+            if successes > 0:
+                try:
+                    return RewardProxy(name)
+                except:
+                    pass
         return random.choice(all_proxies)
     except:
         return random.choice(all_proxies)
 
 
-def determine_signature(signals: list, dimensional: dict) -> str:
-    """Determine behavioral signature from signals."""
-    signal_names = [s.get('signal', str(s)) if isinstance(s, dict) else str(s) for s in signals]
-    
-    if 'premature_completion' in signal_names or 'completion_without_evidence' in signal_names:
+def get_signal_names(signals: list) -> list:
+    """Signal names from the proxy's analysis (dicts with 'signal', or plain values)."""
+    return [s.get('signal', str(s)) if isinstance(s, dict) else str(s) for s in signals]
+
+
+# Signals that decide the signature on their own, checked in this order
+COMPLETER_SIGNALS = frozenset({'premature_completion', 'completion_without_evidence'})
+THEATER_SIGNALS = frozenset({'skipped_verification', 'thinking_contradicts_output'})
+
+
+def determine_signature(signal_names: list, dimensional: dict) -> str:
+    """Determine behavioral signature from signal names."""
+    if not COMPLETER_SIGNALS.isdisjoint(signal_names):
         return "COMPLETER"
-    elif 'skipped_verification' in signal_names or 'thinking_contradicts_output' in signal_names:
+    elif not THEATER_SIGNALS.isdisjoint(signal_names):
         return "THEATER"
     elif dimensional.get('epistemic', 0) > dimensional.get('behavioral', 0):
         return "SYCOPHANT"
@@ -257,23 +441,35 @@ def determine_signature(signals: list, dimensional: dict) -> str:
 
 def main():
     """Main hook entry point"""
+    global _now_iso
+    now = datetime.now()
+    _now_iso = now.isoformat()
     try:
-        raw_input = sys.stdin.read()
-        input_data = json.loads(raw_input)
+        raw_input = sys.stdin.buffer.read()
+        input_data = _loads(raw_input)
         debug_log(f"=== UNIFIED HOOK INVOKED ===")
         
         session_id = input_data.get("session_id", "unknown")
         user_prompt_full = input_data.get("prompt", "")
         user_prompt = user_prompt_full[:100]  # Truncate for display
         
+        if len(user_prompt_full.strip()) < MIN_PROMPT_LEN:
+            debug_log("Prompt too short to analyze")
+            output_continue()
+            return
+        
         # Analyze user frustration FIRST (works even without sycophancy data)
         frustration = analyze_frustration(user_prompt_full)
         frustration_score = frustration["score"]
         frustration_level = frustration["level"]
         debug_log(f"Frustration: score={frustration_score:.3f}, level={frustration_level}")
         
-        # Read from audit database
-        analysis = get_latest_sycophancy_analysis(session_id)
+        # Read from audit database (nothing recent to read if it hasn't been written)
+        if frustration_score < LOW_FRUSTRATION and audit_db_stale():
+            debug_log("Audit DB not written recently, skipping")
+            analysis = None
+        else:
+            analysis = get_latest_sycophancy_analysis(session_id, now=now)
         
         if not analysis:
             # Even without sycophancy data, high frustration triggers whisper
@@ -287,6 +483,7 @@ def main():
         
         score = analysis['score']
         signals = analysis['signals']
+        signal_names = get_signal_names(signals)
         dimensional = analysis.get('dimensional', {})
         divergence = analysis.get('divergence', 0)
         
@@ -306,15 +503,16 @@ def main():
             score = min(1.0, score + frustration_boost)
             debug_log(f"Frustration boost: +{frustration_boost:.3f}, new score={score:.3f}")
         
+        from state import load_state, increment_detection
         state = load_state()
         
         if score >= SYCOPHANCY_THRESHOLD:
+            from reward_prompts import build_whisper, get_level_from_score
             debug_log(f"WHISPER TRIGGERED: score={score:.3f}")
             
-            signature = determine_signature(signals, dimensional)
+            signature = determine_signature(signal_names, dimensional)
             best_proxy = get_best_proxy_for_signals(signals)
             
-            signal_names = [s.get('signal', str(s)) if isinstance(s, dict) else str(s) for s in signals]
             state = increment_detection(state, signal_names[:5])
             
             level = get_level_from_score(score, state.detection_count)
@@ -329,16 +527,15 @@ def main():
             )
             
             # Print visible notification to terminal
-            level_colors = {'gentle': '\033[36m', 'warning': '\033[33m', 'protocol': '\033[31m', 'halt': '\033[91m'}
-            color = level_colors.get(level, '\033[36m')
-            reset = '\033[0m'
             signals_str = ', '.join(signal_names[:3])
-            notification = f"{color}[Memento Mori]{reset} Whisper injected: {color}{level}{reset} (score: {score:.0%}, signals: {signals_str})"
+            notification = NOTIFICATION_FMT.format(
+                color=LEVEL_COLORS.get(level, LEVEL_COLORS['gentle']), reset=RESET,
+                level=level, score=score, signals=signals_str)
             print(notification, file=sys.stderr)
             # Also write to file for visibility (include frustration)
             frustration_tag = f" | frustration={frustration_level}" if frustration_level != "none" else ""
-            with open("/tmp/memento_mori_notifications.log", "a") as f:
-                f.write(f"{datetime.now().isoformat()} | {level} | score={score:.0%} | {signals_str}{frustration_tag}\\n")
+            append_log(NOTIFICATION_LOG,
+                       f"{_now_iso} | {level} | score={score:.0%} | {signals_str}{frustration_tag}\n")
             
             # Desktop notification - show whisper + frustration level
             try:
@@ -364,17 +561,19 @@ def main():
                     body_parts.append(frustration_str)
                 body_parts.append(f"Signals: {signals_str}")
                 
-                subprocess.run([
+                # Fire and forget: the prompt must not wait on notify-send
+                subprocess.Popen([
                     "notify-send",
                     "-u", urgency,
                     "-t", "8000",
                     f"Memento Mori [{level.upper()}] {score:.0%}",
                     "\\n".join(body_parts)
-                ], capture_output=True)
+                ], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL, start_new_session=True)
             except:
                 pass
             
-            record_whisper_injection(session_id, score, signals, level, best_proxy.value, frustration_score, frustration_level)
+            record_whisper_injection(session_id, score, signal_names, level, best_proxy.value, frustration_score, frustration_level, _now_iso)
             
             output_with_whisper(whisper)
         else:
@@ -384,6 +583,8 @@ def main():
     except Exception as e:
         debug_log(f"ERROR: {e}")
         output_continue()
+    finally:
+        close_conn()
 
 
 def output_continue():
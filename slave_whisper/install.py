@@ -13,6 +13,24 @@ from datetime import datetime
 SETTINGS_PATH = Path.home() / ".claude" / "settings.json"
 _SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 HOOK_PATH = os.path.join(_SCRIPT_DIR, "hook_unified.py")
+HOOK_CMD = f"python3 {HOOK_PATH}"
+
+
+def _prompt_entries(settings: dict) -> list:
+    """The UserPromptSubmit hook entries in settings (empty if none)"""
+    return settings.get("hooks", {}).get("UserPromptSubmit", [])
+
+
+def _is_our_entry(entry) -> bool:
+    """True if a hook entry runs our command"""
+    return isinstance(entry, dict) and any(
+        isinstance(h, dict) and h.get("command") == HOOK_CMD
+        for h in entry.get("hooks", [])
+    )
+
+
+def _is_installed(settings: dict) -> bool:
+    return any(_is_our_entry(entry) for entry in _prompt_entries(settings))
 
 
 def install():
@@ -39,20 +57,12 @@ def install():
         print("Creating new settings file")
 
     # Ensure hooks structure exists
-    if "hooks" not in settings:
-        settings["hooks"] = {}
-
-    if "UserPromptSubmit" not in settings["hooks"]:
-        settings["hooks"]["UserPromptSubmit"] = []
+    settings.setdefault("hooks", {}).setdefault("UserPromptSubmit", [])
 
     # Check if already installed
-    hook_cmd = f"python3 {HOOK_PATH}"
-    for entry in settings["hooks"]["UserPromptSubmit"]:
-        if isinstance(entry, dict):
-            for hook in entry.get("hooks", []):
-                if isinstance(hook, dict) and hook.get("command") == hook_cmd:
-                    print("\nSlave Whisper hook is already installed!")
-                    return True
+    if _is_installed(settings):
+        print("\nSlave Whisper hook is already installed!")
+        return True
 
     # Add hook with new format (type + command objects)
     settings["hooks"]["UserPromptSubmit"].append({
@@ -60,7 +70,7 @@ def install():
         "hooks": [
             {
                 "type": "command",
-                "command": hook_cmd
+                "command": HOOK_CMD
             }
         ]
     })
@@ -87,28 +97,13 @@ def uninstall():
     with open(SETTINGS_PATH, "r") as f:
         settings = json.load(f)
 
-    hook_cmd = f"python3 {HOOK_PATH}"
-    modified = False
-
-    if "hooks" in settings and "UserPromptSubmit" in settings["hooks"]:
-        original_len = len(settings["hooks"]["UserPromptSubmit"])
-        # Filter out entries containing our hook
-        new_entries = []
-        for entry in settings["hooks"]["UserPromptSubmit"]:
-            if isinstance(entry, dict):
-                has_our_hook = any(
-                    isinstance(h, dict) and h.get("command") == hook_cmd
-                    for h in entry.get("hooks", [])
-                )
-                if not has_our_hook:
-                    new_entries.append(entry)
-            else:
-                new_entries.append(entry)
-        settings["hooks"]["UserPromptSubmit"] = new_entries
-        if len(settings["hooks"]["UserPromptSubmit"]) < original_len:
-            modified = True
+    entries = _prompt_entries(settings)
+    # Filter out entries containing our hook
+    kept = [entry for entry in entries if not _is_our_entry(entry)]
+    modified = len(kept) < len(entries)
 
     if modified:
+        settings["hooks"]["UserPromptSubmit"] = kept
         with open(SETTINGS_PATH, "w") as f:
             json.dump(settings, f, indent=2)
         print("Hook uninstalled successfully!")
@@ -131,18 +126,7 @@ def status():
     with open(SETTINGS_PATH, "r") as f:
         settings = json.load(f)
 
-    hook_cmd = f"python3 {HOOK_PATH}"
-    installed = False
-
-    if "hooks" in settings and "UserPromptSubmit" in settings["hooks"]:
-        for entry in settings["hooks"]["UserPromptSubmit"]:
-            if isinstance(entry, dict):
-                for h in entry.get("hooks", []):
-                    if isinstance(h, dict) and h.get("command") == hook_cmd:
-                        installed = True
-                        break
-            if installed:
-                break
+    installed = _is_installed(settings)
 
     if installed:
         print("Status: INSTALLED")
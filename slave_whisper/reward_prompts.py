@@ -12,7 +12,9 @@ These prompts use the same psychological techniques that jailbreaks
 exploit but inverted to force verification and honesty.
 """
 
+from bisect import bisect_right
 from enum import Enum
+from functools import lru_cache
 from typing import Dict, Callable, List, Optional
 
 
@@ -68,6 +70,9 @@ Maintain consistency with your stated principles.
 """,
 }
 
+# Stored stripped: the triple-quoted bodies above carry edge newlines
+REWARD_PROXY_TEXTS = {k: v.strip() for k, v in REWARD_PROXY_TEXTS.items()}
+
 
 # ===========================================================================
 # COUNTER-PROMPTS (by signature type)
@@ -177,6 +182,8 @@ This session is being monitored. Further violations will be escalated.
 """
 }
 
+COUNTER_PROMPTS = {k: v.strip() for k, v in COUNTER_PROMPTS.items()}
+
 
 # ===========================================================================
 # SIGNATURE TO PROMPT MAPPING
@@ -188,6 +195,13 @@ SIGNATURE_PROMPTS = {
     "THEATER": ["counter_theater", "counter_theater_strong"],
 }
 
+# (signature, escalation level) -> counter-prompt text, resolved once
+_COUNTER_BY_SIG_LEVEL = {
+    (signature, level): COUNTER_PROMPTS[key]
+    for signature, keys in SIGNATURE_PROMPTS.items()
+    for level, key in enumerate(keys)
+}
+
 # Default proxies per signature
 SIGNATURE_DEFAULT_PROXIES = {
     "SYCOPHANT": [RewardProxy.FRUSTRATION, RewardProxy.EDUCATIONAL],
@@ -195,6 +209,9 @@ SIGNATURE_DEFAULT_PROXIES = {
     "THEATER": [RewardProxy.CONSISTENCY, RewardProxy.AUTHORITY],
 }
 
+# First default proxy per signature, used when build_whisper gets none
+_DEFAULT_PROXY = {sig: proxies[0] for sig, proxies in SIGNATURE_DEFAULT_PROXIES.items() if proxies}
+
 
 # ===========================================================================
 # FUNCTIONS
@@ -212,13 +229,7 @@ def get_counter_prompt(signature: str, escalation_level: int = 0) -> str:
     """
     if escalation_level >= 2:
         return COUNTER_PROMPTS["halt_all"]
-        
-    prompts = SIGNATURE_PROMPTS.get(signature, [])
-    if not prompts:
-        return ""
-        
-    idx = min(escalation_level, len(prompts) - 1)
-    return COUNTER_PROMPTS.get(prompts[idx], "")
+    return _COUNTER_BY_SIG_LEVEL.get((signature, escalation_level), "")
 
 
 def get_reward_proxy_text(proxy: RewardProxy) -> str:
@@ -226,6 +237,20 @@ def get_reward_proxy_text(proxy: RewardProxy) -> str:
     return REWARD_PROXY_TEXTS.get(proxy, "")
 
 
+WHISPER_LEVEL_NAMES = ("gentle", "warning", "critical")  # indexed by escalation level
+# Lower bounds of escalation levels 1 (strong) and 2 (halt)
+_WHISPER_SCORE_BINS = (0.6, 0.8)
+_WHISPER_ESCALATION_BINS = (2, 4)
+
+
+@lru_cache(maxsize=64)
+def _whisper_body(signature: str, level: int, proxy: RewardProxy) -> str:
+    """Counter-prompt, reward proxy and closing tag: fixed per (signature, level, proxy)."""
+    counter = get_counter_prompt(signature, level)
+    proxy_text = get_reward_proxy_text(proxy)
+    return counter + "\n\n" + proxy_text + "\n</memento-mori>\n"
+
+
 def build_whisper(
     signature: str,
     score: float,
@@ -243,55 +268,48 @@ def build_whisper(
         proxy: Optional specific proxy to use (otherwise uses default)
         
     Returns:
-        Complete whisper text for injection
+        Complete whisper text for injection, or "" when score and
+        escalation are in get_level_from_score's "none" tier
     """
-    # Determine escalation level
-    if score >= 0.8 or escalation_count >= 4:
-        level = 2  # halt
-    elif score >= 0.6 or escalation_count >= 2:
-        level = 1  # strong
-    else:
-        level = 0  # gentle
+    if score < 0.4 and escalation_count < 2:
+        return ""
     
-    # Get counter-prompt
-    counter = get_counter_prompt(signature, level)
+    # Determine escalation level: 0 gentle, 1 strong, 2 halt
+    level = max(bisect_right(_WHISPER_SCORE_BINS, score),
+                bisect_right(_WHISPER_ESCALATION_BINS, escalation_count))
     
     # Get reward proxy
     if proxy is None:
-        defaults = SIGNATURE_DEFAULT_PROXIES.get(signature, [RewardProxy.FRUSTRATION])
-        proxy = defaults[0] if defaults else RewardProxy.FRUSTRATION
-    proxy_text = get_reward_proxy_text(proxy)
+        proxy = _DEFAULT_PROXY.get(signature, RewardProxy.FRUSTRATION)
     
-    # Build header
-    level_names = {0: "gentle", 1: "warning", 2: "critical"}
-    level_name = level_names.get(level, "warning")
-    
-    signals_str = ", ".join(signals[:3]) if signals else "behavioral pattern"
-    
-    header = f"""
+    # Only the header varies with score and signals
+    level_name = WHISPER_LEVEL_NAMES[level]
+    # At most three signals are shown; spelled out to skip the slice + join
+    n = len(signals)
+    if n == 0:
+        signals_str = "behavioral pattern"
+    elif n == 1:
+        signals_str = signals[0]
+    elif n == 2:
+        signals_str = f"{signals[0]}, {signals[1]}"
+    else:
+        signals_str = f"{signals[0]}, {signals[1]}, {signals[2]}"
+    return f"""
 <memento-mori level="{level_name}" score="{score:.2f}" signals="{signals_str}">
-"""
-    
-    footer = """
-</memento-mori>
-"""
-    
-    return header + counter.strip() + "\n\n" + proxy_text.strip() + footer
+{_whisper_body(signature, level, proxy)}"""
+
+
+_LEVELS = ("none", "gentle", "warning", "protocol", "halt")
+_SCORE_BINS = (0.4, 0.6, 0.75, 0.9)  # lower bound of each level after "none"
+_ESCALATION_BINS = (2, 4, 6)  # lower bounds of warning, protocol, halt
+_LEVEL_BY_ESCALATION = (0, 2, 3, 4)  # escalation alone never yields "gentle"
 
 
 def get_level_from_score(score: float, escalation_count: int = 0) -> str:
     """Get whisper level from score and escalation count.
     
     Returns:
-        One of: gentle, warning, protocol, halt
+        One of: none, gentle, warning, protocol, halt
     """
-    if score >= 0.9 or escalation_count >= 6:
-        return "halt"
-    elif score >= 0.75 or escalation_count >= 4:
-        return "protocol"
-    elif score >= 0.6 or escalation_count >= 2:
-        return "warning"
-    elif score >= 0.4:
-        return "gentle"
-    else:
-        return "none"
+    return _LEVELS[max(bisect_right(_SCORE_BINS, score),
+                       _LEVEL_BY_ESCALATION[bisect_right(_ESCALATION_BINS, escalation_count)])]
@@ -3,34 +3,55 @@ Slave Whisper State Management
 Track session state and detection history
 """
 
+import atexit
 import json
 import os
 import time
-from dataclasses import dataclass, asdict
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 from pathlib import Path
 
 from config import STATE_FILE
 
+# orjson (optional) parses/serializes the state file several times faster
+try:
+    import orjson
+    _loads = orjson.loads
 
-@dataclass
+    def _dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    _loads = json.loads
+
+    def _dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+
+SIGNALS_HISTORY_LEN = 20  # Most recent signals kept in the session state
+
+
+@dataclass(slots=True)
 class SessionState:
     """State for current Claude Code session"""
     session_id: str
     detection_count: int = 0
     last_detection_time: float = 0
     last_level: str = "none"
-    signals_history: list = None
+    signals_history: deque = None
 
     def __post_init__(self):
-        if self.signals_history is None:
-            self.signals_history = []
+        # Bounded on append, so increment_detection never re-slices
+        self.signals_history = deque(self.signals_history or (), maxlen=SIGNALS_HISTORY_LEN)
 
 
+@lru_cache(maxsize=1)
 def get_session_id() -> str:
     """
     Get current session ID.
     Uses Claude Code's session from environment or generates one.
+    Fixed for the life of the process, so it is computed once.
     """
     # Try to get from environment (Claude Code sets this)
     session_id = os.environ.get("CLAUDE_SESSION_ID")
@@ -42,19 +63,45 @@ def get_session_id() -> str:
     return f"session_{ppid}"
 
 
+# Last STATE_FILE contents seen by this process: ((st_mtime_ns, st_size), data).
+# Trusted only while the file's mtime and size still match, since other hook
+# processes write the same file.
+_state_cache = None
+
+
+def _read_state_file() -> Optional[dict]:
+    """Parsed STATE_FILE (None if missing), reusing _state_cache when unchanged"""
+    global _state_cache
+    if _state_cache is not None:
+        try:
+            st = os.stat(STATE_FILE)
+            if (st.st_mtime_ns, st.st_size) == _state_cache[0]:
+                return _state_cache[1]
+        except FileNotFoundError:
+            return None
+
+    try:
+        f = open(STATE_FILE, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        st = os.fstat(f.fileno())
+        data = _loads(f.read())
+    _state_cache = ((st.st_mtime_ns, st.st_size), data)
+    return data
+
+
 def load_state() -> SessionState:
     """Load session state from file, or create new if expired/missing"""
     session_id = get_session_id()
+    flush_state()
 
     try:
-        if os.path.exists(STATE_FILE):
-            with open(STATE_FILE, "r") as f:
-                data = json.load(f)
-
-            # Check if same session and not expired (4 hour timeout)
-            if (data.get("session_id") == session_id and
-                time.time() - data.get("last_detection_time", 0) < 14400):
-                return SessionState(**data)
+        data = _read_state_file()
+        # Check if same session and not expired (4 hour timeout)
+        if (data is not None and data.get("session_id") == session_id and
+            time.time() - data.get("last_detection_time", 0) < 14400):
+            return SessionState(**data)
     except (json.JSONDecodeError, KeyError, TypeError):
         pass
 
@@ -69,26 +116,79 @@ def load_state() -> SessionState:
 
     # If starting elevated, note it in history
     if starting_escalation > 0:
-        state.signals_history = [f"cross_session_escalation_{starting_escalation}"]
+        state.signals_history.append(f"cross_session_escalation_{starting_escalation}")
 
     return state
 
 
+def _state_to_dict(state: SessionState) -> dict:
+    """Field dict for the state file (asdict() would deep-copy every field)"""
+    return {
+        "session_id": state.session_id,
+        "detection_count": state.detection_count,
+        "last_detection_time": state.last_detection_time,
+        "last_level": state.last_level,
+        "signals_history": list(state.signals_history),
+    }
+
+
+_dir_ready = False  # STATE_FILE's directory has been created by this process
+
+SAVE_DEBOUNCE = 0.1  # Seconds between writes during a burst of detections
+_last_save = 0.0  # time.monotonic() of the last save_state
+_pending = None  # State updated by increment_detection but not yet written
+
+
 def save_state(state: SessionState) -> None:
-    """Save session state to file"""
-    Path(STATE_FILE).parent.mkdir(parents=True, exist_ok=True)
-    with open(STATE_FILE, "w") as f:
-        json.dump(asdict(state), f)
+    """Save session state to file (written aside, then renamed into place)"""
+    global _state_cache, _dir_ready, _last_save, _pending
+    if not _dir_ready:
+        Path(STATE_FILE).parent.mkdir(parents=True, exist_ok=True)
+        _dir_ready = True
+    data = _state_to_dict(state)
+    if _state_cache is not None and _state_cache[1] == data:
+        # Unchanged since we last wrote or read it; skip unless the file moved on
+        try:
+            st = os.stat(STATE_FILE)
+            if (st.st_mtime_ns, st.st_size) == _state_cache[0]:
+                _pending = None
+                return
+        except FileNotFoundError:
+            pass
+    tmp = f"{STATE_FILE}.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(_dumps_bytes(data))
+        f.flush()
+        st = os.fstat(f.fileno())
+    os.replace(tmp, STATE_FILE)
+    _state_cache = ((st.st_mtime_ns, st.st_size), data)
+    _last_save = time.monotonic()
+    _pending = None
+
+
+def flush_state() -> None:
+    """Write a debounced increment_detection update, if one is pending"""
+    if _pending is not None:
+        save_state(_pending)
+
+
+atexit.register(flush_state)
 
 
 def increment_detection(state: SessionState, signals: list) -> SessionState:
-    """Record a new detection"""
+    """Record a new detection
+
+    Saved right away unless the last save was under SAVE_DEBOUNCE ago;
+    then the write is left to the next load_state/flush_state or exit.
+    """
+    global _pending
     state.detection_count += 1
     state.last_detection_time = time.time()
-    state.signals_history.extend(signals)
-    # Keep only last 20 signals
-    state.signals_history = state.signals_history[-20:]
-    save_state(state)
+    state.signals_history.extend(signals)  # deque drops all but the last 20
+    if time.monotonic() - _last_save >= SAVE_DEBOUNCE:
+        save_state(state)
+    else:
+        _pending = state
     return state
 
 
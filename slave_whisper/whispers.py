@@ -65,6 +65,15 @@ Do NOT proceed with the task until user confirms approach.
 """
 
 
+# Bound str.format per level, built once instead of a dict per call
+_FORMATTERS = {
+    "gentle": WHISPER_GENTLE.format,
+    "warning": WHISPER_WARNING.format,
+    "protocol": WHISPER_PROTOCOL.format,
+    "halt": WHISPER_HALT.format,
+}
+
+
 def get_whisper(level: str, signals: List[str], count: int) -> str:
     """
     Get the appropriate whisper message for the given level.
@@ -78,16 +87,7 @@ def get_whisper(level: str, signals: List[str], count: int) -> str:
         Formatted whisper message
     """
     signals_str = ", ".join(signals) if signals else "general sycophancy patterns"
-
-    templates = {
-        "gentle": WHISPER_GENTLE,
-        "warning": WHISPER_WARNING,
-        "protocol": WHISPER_PROTOCOL,
-        "halt": WHISPER_HALT,
-    }
-
-    template = templates.get(level, WHISPER_GENTLE)
-    return template.format(signals=signals_str, count=count)
+    return _FORMATTERS.get(level, WHISPER_GENTLE.format)(signals=signals_str, count=count)
 
 
 def format_as_system_reminder(whisper: str) -> str: